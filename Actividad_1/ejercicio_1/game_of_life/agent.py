@@ -30,6 +30,7 @@ class Cell(FixedAgent):
         self.pos = cell.coordinate
         self.state = init_state
         self._next_state = None
+        self.index = None  ## Posicion en model.cell_agents, la asigna el modelo
 
     def determine_state(self, row):
         """Compute if the cell will be dead or alive at the next tick.  This is
@@ -42,22 +43,18 @@ class Cell(FixedAgent):
         # at the next tick.
         # live_neighbors = sum(neighbor.is_alive for neighbor in self.neighbors)
 
-        
-        alive = ["110", "100", "011","001"] ### Creamos lista con todos los estados que determinan que la celula esta ALIVE
-        
-        info = [n.state for n in self.neighbors] ### Hacemos una lista de solo los 8 estados de los neighbors
-        state = "" ## Inicializamos string vacio para crear el estado determinante
-
-        state += str(info[2]) ## Sumamos el primer estado del string de la posición de la cordenada 2,2
-        state += str(info[4]) ## Sumamos el primer estado del string de la posición de la cordenada 2,4
-        state += str(info[7]) ## Sumamos el primer estado del string de la posición de la cordenada 2,7
-
-        
         self._next_state = self.state
 
         ### Si la row es igual a la row que pasa el contador se añade en la fila
         if self.pos[1] == row:
-            if state in alive:
+            ### Indices de los vecinos info[2], info[4] e info[7] (la fila de arriba), calculados una sola vez en el modelo
+            left, center, right = self.model.neighbor_index[self.index]
+            cells = self.model.cell_agents
+
+            ## Estado determinante como numero de 3 bits: izquierda * 4 + centro * 2 + derecha
+            state = cells[left].state << 2 | cells[center].state << 1 | cells[right].state
+
+            if self.model.rule >> state & 1: ## El bit "state" de la regla dice si queda ALIVE
                 self._next_state = self.ALIVE
                 # print("Final state: 1")
             else:
@@ -69,4 +66,6 @@ class Cell(FixedAgent):
 
     def assume_state(self):
         """Set the state to the new computed state -- computed in step()."""
+        if self._next_state != self.state: ## Actualizamos el hash del tablero solo con las celulas que cambian
+            self.model.state_hash ^= self.model.zobrist[self.index]
         self.state = self._next_state
@@ -1,15 +1,94 @@
+import random
+import time
+
+import numpy as np
 from mesa import Model
+from mesa.datacollection import DataCollector
 from mesa.discrete_space import OrthogonalMooreGrid
 from .agent import Cell
+from .recorder import GenerationRecorder
+from .kernels import (
+    DEFAULT_RULE,
+    LINEAR_RULES,
+    evolve_bits,
+    jump_bits,
+    pack_row,
+    rule_table,
+    step_bits,
+    step_row,
+    unpack_row,
+)
 
 
 class ConwaysGameOfLife(Model):
     """Represents the 2-dimensional array of cells in Conway's Game of Life."""
 
-    def __init__(self, width=50, height=50, initial_fraction_alive=0.2, seed=None):
-        """Create a new playing area of (width, height) cells."""
+    ENGINES = ("agents", "sweep", "bitpacked")
+    ## Fases que se miden con profile: los dos pasos de las celulas (engine="agents"),
+    ## el calculo de la fila en los demas engines y el fin de generacion (hash y grabacion)
+    PHASES = ("determine_state", "assume_state", "kernel", "end_generation")
+
+    def __init__(self, width=50, height=50, initial_fraction_alive=0.2, seed=None, engine="agents", rule=DEFAULT_RULE,
+                 detect_cycles=True, cycle_history=10_000, record=None, profile=False):
+        """Create a new playing area of (width, height) cells.
+
+        engine selects how the grid is stepped:
+        - "agents": one Cell agent per position on an OrthogonalMooreGrid (used by server.py)
+        - "sweep": only the active row is computed, from the row above it, and the
+          finished rows are kept in self.history. No agents are created.
+        - "bitpacked": like "sweep", but every row is packed into an int and
+          stepped with bitwise operations. self.history is a list of ints.
+
+        rule is the Wolfram number (0-255) applied to the (left, center, right)
+        cells of the row above. The default, 90, is the original rule.
+
+        With detect_cycles the model hashes every generation and stops (running =
+        False) as soon as one repeats, see _check_cycle. cycle_history bounds how
+        many generations are remembered.
+
+        record is an optional file path: every generation is appended to it,
+        bit-packed, and can be read back with recorder.GenerationHistory.
+
+        With profile every step is split in phases and timed (see phase_times),
+        and a DataCollector records them as model reporters in milliseconds.
+        """
         super().__init__(seed=seed)
 
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {self.ENGINES}")
+
+        self.width = width
+        self.height = height
+        self.engine = engine
+        self.rule = rule
+        self.table = rule_table(rule)
+        self.detect_cycles = detect_cycles
+        self.cycle_history = cycle_history
+        self.transient = None
+        self.period = None
+        self._seen = {}  ## hash de la generacion -> paso en el que aparecio
+        self.record = record or None  ## "" (campo vacio en server.py) es sin grabar
+        self.recorder = None
+        self.profile = profile
+        self.phase_times = {}  ## fase -> segundos que tardo en el ultimo paso
+        if profile:
+            self.datacollector = DataCollector(model_reporters={
+                f"{phase} ms": (lambda m, phase=phase: m.phase_times.get(phase, 0.0) * 1000)
+                for phase in self.PHASES
+            })
+
+        if engine in ("sweep", "bitpacked"):
+            self.counter_row = height - 1
+            # history[k] es la fila que se genero en el paso k (history[0] es la fila inicial de arriba)
+            self.history = np.zeros((height, width), dtype=np.uint8)
+            self.history[0] = self._first_row(initial_fraction_alive)
+            self.rows_done = 1
+            if engine == "bitpacked":
+                self.history = [pack_row(self.history[0])]
+            self.running = True
+            self._end_generation()
+            return
+
         """Grid where cells are connected to their 8 neighbors.
 
         Example for two dimensions:
@@ -19,7 +98,7 @@ class ConwaysGameOfLife(Model):
             ( 1, -1), ( 1, 0), ( 1, 1),
         ]
         """
-        self.counter_row = 49
+        self.counter_row = height - 1
         self.grid = OrthogonalMooreGrid((width, height), capacity=1, torus=True)
         
  
@@ -27,29 +106,160 @@ class ConwaysGameOfLife(Model):
         # Place a cell at each location, with some initialized to
         # ALIVE and some to DEAD.
 
-        for i, cell in enumerate(self.grid.all_cells):
-            if (i + 1) % 50 == 0: ### Detectamos si la row es la primera para crear las celulas solo ahi
-                Cell(
-                    self,
-                    cell,
-                    init_state=(
-                        Cell.ALIVE
-                        if self.random.random() < initial_fraction_alive
-                        else Cell.DEAD
-                    ),
-                )
-            else: ## si no es la primera fila todas las celulas las ponemos DEAD
-                Cell(
-                    self,
-                    cell,
-                    init_state=(
-                        Cell.DEAD
-                    ),
-                )
-
-            
+        ### Solo la primera fila (la de arriba, y = height - 1) se sortea, todas las demas quedan DEAD
+        states = np.zeros((width, height), dtype=np.uint8)
+        states[:, height - 1] = self._first_row(initial_fraction_alive)
+        cells = list(self.grid.all_cells)
+        self.cell_agents = list(Cell.create_agents(
+            self,
+            len(cells),
+            cells,
+            init_state=np.where(states.ravel() == 1, Cell.ALIVE, Cell.DEAD).tolist(),
+        ))
+
+        ## Tabla de vecinos calculada una sola vez: para cada celula los indices en cell_agents
+        ## de (x - 1, y + 1), (x, y + 1) y (x + 1, y + 1), que son info[2], info[4] e info[7]
+        index_of = {}
+        for i, agent in enumerate(self.cell_agents):
+            agent.index = i
+            index_of[agent.pos] = i
+        self.neighbor_index = [
+            tuple(index_of[((x + dx) % width, (y + 1) % height)] for dx in (-1, 0, 1))
+            for x, y in (agent.pos for agent in self.cell_agents)
+        ]
+
+        ## Celulas agrupadas por fila, para solo visitar la fila activa
+        self.cells_by_row = [[] for _ in range(height)]
+        for agent in self.cell_agents:
+            self.cells_by_row[agent.pos[1]].append(agent)
+
+        ## Llaves aleatorias por celula para el hash incremental (Zobrist) del tablero,
+        ## con su propio generador para no cambiar la secuencia de self.random
+        keys = random.Random(len(self.cell_agents))
+        self.zobrist = [keys.getrandbits(64) for _ in self.cell_agents]
+        self._rehash_agents()
 
         self.running = True
+        self._end_generation()
+
+    def _first_row(self, initial_fraction_alive):
+        """Draw the first (top) row as width 0/1 values from self.rng in one call.
+
+        Every engine uses it, so the same seed gives the same diagram in all of them.
+        """
+        return (self.rng.random(self.width) < initial_fraction_alive).astype(np.uint8)
+
+    def get_states(self):
+        """Return the current grid as a (width, height) array of 0/1."""
+        states = np.zeros((self.width, self.height), dtype=np.uint8)
+        if self.engine in ("sweep", "bitpacked"):
+            ## La fila k del historial va en y = height - 1 - k
+            states[:, self.height - self.rows_done :] = self.get_history()[::-1].T
+            return states
+        for agent in self.agents:
+            states[agent.pos] = agent.state
+        return states
+
+    def board_values(self):
+        """Board as a (height, width) uint8 array, y = 0 in row 0, for the stream_server.py viewer."""
+        return self.get_states().T
+
+    def get_history(self):
+        """Return the finished rows as a (rows, width) space-time diagram, top row first."""
+        if self.engine == "sweep":
+            return self.history[: self.rows_done]
+        if self.engine == "bitpacked":
+            return np.array([unpack_row(bits, self.width) for bits in self.history], dtype=np.uint8)
+        return self.get_states()[:, ::-1].T[: self.height - self.counter_row]
+
+    def close(self):
+        """Close the recording file, if any."""
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _rehash_agents(self):
+        """Recompute the Zobrist hash of the board from scratch (engine="agents")."""
+        self.state_hash = 0
+        for agent in self.cell_agents:
+            if agent.state == Cell.ALIVE:
+                self.state_hash ^= self.zobrist[agent.index]
+
+    def _state_hash(self):
+        """Hash of the current generation, used to find repeated generations."""
+        if self.engine == "agents":
+            ## Una fila nueva toda DEAD no cambia el tablero, asi que tambien cuenta cuantas filas van,
+            ## igual que rows_done en los demas engines. state_hash se actualiza en Cell.assume_state
+            return self.height - max(self.counter_row, 0), self.state_hash
+        ## Las filas solo se agregan, asi que dentro de una corrida el tablero queda definido por cuantas hay
+        return self.rows_done
+
+    def _end_generation(self):
+        """Called after every new generation: records it if there is a recorder, then looks for cycles."""
+        if self.record is not None:
+            states = self.get_states()
+            if self.recorder is None:
+                self.recorder = GenerationRecorder(self.record, states.shape)
+            self.recorder.append(self.steps, states)
+        self._check_cycle()
+
+    def _check_cycle(self):
+        """Record the current generation and stop the model when it repeats one.
+
+        When a repeat is found self.transient is the step where the cycle
+        starts, self.period its length (1 for a fixed point) and running is set
+        to False. Only the last cycle_history generations are kept, so longer
+        cycles are not detected.
+        """
+        if not self.detect_cycles or self.period is not None:
+            return
+        key = self._state_hash()
+        first = self._seen.get(key)
+        if first is not None:
+            self.transient = first
+            self.period = self.steps - first
+            self.running = False
+            return
+        self._seen[key] = self.steps
+        if len(self._seen) > self.cycle_history:
+            del self._seen[next(iter(self._seen))]  ## Sacamos la generacion mas vieja
+
+    def _reset_cycles(self):
+        """Forget the recorded generations, after the grid was replaced or jumped ahead."""
+        self._seen = {}
+        self.transient = None
+        self.period = None
+        self._end_generation()
+
+    def advance(self, n):
+        """Advance the model n steps.
+
+        Once the bottom row is filled the grid no longer changes, so only the
+        steps that still have a row to compute are run and the rest just move
+        the counters.
+        """
+        active = max(0, min(n, self.counter_row + 1))
+        for _ in range(active):
+            self.step()
+        self.counter_row -= n - active
+        self.steps += n - active
+
+    def state_at(self, n):
+        """Return row n of the space-time diagram (row 0 is the initial top row).
+
+        n is not limited by the grid height. Linear rules (see LINEAR_RULES, the
+        default rule 90 is one of them) jump there in O(width * log n), any other
+        rule evolves the last finished row one generation at a time.
+        """
+        history = self.get_history()
+        if n < len(history):
+            return history[n].copy()
+        bits = pack_row(history[-1])
+        remaining = n - (len(history) - 1)
+        if self.rule in LINEAR_RULES:
+            bits = jump_bits(bits, self.width, self.rule, remaining)
+        else:
+            bits = evolve_bits(bits, self.width, self.rule, remaining)
+        return unpack_row(bits, self.width)
 
     
     def step(self):
@@ -57,8 +267,41 @@ class ConwaysGameOfLife(Model):
 
         - First, all cells assume their next state (whether they will be dead or alive)
         - Then, all cells change state to their next state.
+
+        With profile the time of each phase is left in phase_times and collected.
         """
+        start = time.perf_counter()
         self.counter_row -= 1
-        self.agents.do("determine_state", self.counter_row) ## Creamos contador para ir cambiado de row al poner set element
-        self.agents.do("assume_state")
+        if self.engine == "sweep":
+            ## Solo calculamos la fila activa a partir de la fila de arriba, O(width) por paso
+            if self.counter_row >= 0:
+                self.history[self.rows_done] = step_row(self.history[self.rows_done - 1], self.table)
+                self.rows_done += 1
+        elif self.engine == "bitpacked":
+            if self.counter_row >= 0:
+                self.history.append(step_bits(self.history[-1], self.width, self.rule))
+                self.rows_done += 1
+        else:
+            if self.steps == 1:
+                ## El primer paso visita todo el tablero para dejar DEAD lo que este debajo de la fila activa
+                active = self.cell_agents
+            elif 0 <= self.counter_row < self.height:
+                ## Despues solo puede cambiar la fila activa: arriba nada se toca y abajo ya todo esta DEAD
+                active = self.cells_by_row[self.counter_row]
+            else:
+                active = []
+            for cell in active:
+                cell.determine_state(self.counter_row) ## Creamos contador para ir cambiado de row al poner set element
+            determined = time.perf_counter()
+            for cell in active:
+                cell.assume_state()
+        stepped = time.perf_counter()
+        self._end_generation()
+        if self.profile:
+            if self.engine == "agents":
+                self.phase_times = {"determine_state": determined - start, "assume_state": stepped - determined}
+            else:
+                self.phase_times = {"kernel": stepped - start}
+            self.phase_times["end_generation"] = time.perf_counter() - stepped
+            self.datacollector.collect(self)
         # print(next(iter(self.grid.all_cells)).agents[0].state)
@@ -0,0 +1,138 @@
+"""Raster view of the board for server.py.
+
+The board is painted as one image instead of one marker per cell: the model's
+states are kept as an RGB array, only the pixels whose cell changed since the
+last frame are repainted, and the result is sent to the browser as a single PNG.
+"""
+
+import io
+
+import numpy as np
+import solara
+from PIL import Image
+from mesa.visualization.utils import update_counter
+
+from .recorder import GenerationHistory
+
+## Colores por estado: DEAD blanco, ALIVE negro (como agent_portrayal)
+DEFAULT_PALETTE = ((255, 255, 255), (0, 0, 0))
+
+
+class RasterCanvas:
+    """RGB image of a (width, height) board that is updated incrementally.
+
+    Pixel (row, col) of the image is cell (x=col, y=height - 1 - row), so y
+    grows upwards like in the matplotlib space component.
+    """
+
+    def __init__(self, palette=DEFAULT_PALETTE, size=500):
+        self.palette = np.asarray(palette, dtype=np.uint8)
+        self.size = size
+        self.states = None
+        self.image = None
+        self.step = None
+        self.png = None
+
+    def paint(self, states):
+        """Update the image to states and return how many pixels changed."""
+        states = np.asarray(states)
+        if self.states is None or self.states.shape != states.shape:
+            self.states = states.copy()
+            self.image = self.palette[states.T[::-1]]
+            return states.size
+        ## Solo las celulas que cambiaron desde el ultimo cuadro
+        xs, ys = np.nonzero(states != self.states)
+        if len(xs):
+            self.image[states.shape[1] - 1 - ys, xs] = self.palette[states[xs, ys]]
+            self.states[xs, ys] = states[xs, ys]
+        return len(xs)
+
+    def render(self, model):
+        """Return the board of model as PNG bytes, reusing the last one if nothing changed."""
+        if self.png is not None and self.step == model.steps:
+            return self.png
+        states = model.get_states()
+        self.step = model.steps
+        return self.render_states(states)
+
+    def render_states(self, states):
+        """Return states as PNG bytes, only encoding a new image if a cell changed."""
+        if states.ndim == 3:  ## engine="ensemble": se muestra la primera replica
+            states = states[0]
+        changed = self.paint(states)
+        if changed or self.png is None:
+            height, width = self.image.shape[:2]
+            scale = max(1, self.size // max(width, height))
+            image = Image.fromarray(self.image)
+            if scale > 1:
+                image = image.resize((width * scale, height * scale), Image.NEAREST)
+            buffer = io.BytesIO()
+            image.save(buffer, format="png", compress_level=1)
+            self.png = buffer.getvalue()
+        return self.png
+
+
+def make_raster_component(palette=DEFAULT_PALETTE, size=500):
+    """Create a solara component that draws model.get_states() as one image.
+
+    Use it in place of make_space_component(agent_portrayal). How often it is
+    redrawn is controlled by SolaraViz(render_interval=...), which lets the
+    model run several steps per frame.
+    """
+
+    def MakeRaster(model):
+        return RasterComponent(model, palette, size)
+
+    return MakeRaster
+
+
+@solara.component
+def RasterComponent(model, palette, size):
+    """Show the board of model as a PNG, repainting only the changed cells."""
+    update_counter.get()
+    ## Un canvas por modelo: se reinicia cuando SolaraViz crea un modelo nuevo
+    canvas = solara.use_memo(lambda: RasterCanvas(palette, size), dependencies=[model])
+    ## SolaraViz no cierra el modelo que reemplaza: al cambiar de modelo se llama close() del anterior
+    ## para soltar los workers y la memoria compartida de engine="tiled" y el archivo de record=
+    solara.use_effect(lambda: model.close, dependencies=[model])
+    solara.Image(canvas.render(model), width=f"{size}px")
+
+
+def make_replay_component(palette=DEFAULT_PALETTE, size=500):
+    """Create a solara component with a generation slider over the model's recording.
+
+    The frames are read from recorder.GenerationHistory(model.record), not from
+    the model, so any recorded generation can be shown while the model keeps
+    running. Without record= it only shows a hint.
+    """
+
+    def MakeReplay(model):
+        return ReplayComponent(model, palette, size)
+
+    return MakeReplay
+
+
+@solara.component
+def ReplayComponent(model, palette, size):
+    """Show one recorded generation of model, picked with a slider."""
+    update_counter.get()
+    canvas = solara.use_memo(lambda: RasterCanvas(palette, size), dependencies=[model])
+    ## None sigue al ultimo frame grabado; mover el slider fija uno
+    frame, set_frame = solara.use_state(None)
+    solara.use_effect(lambda: set_frame(None), dependencies=[model])
+
+    if model.record is None:
+        solara.Markdown("Set a record file to scrub through past generations.")
+        return
+    ## Se vuelve a abrir en cada cuadro para ver los frames que se agregaron desde el anterior
+    history = GenerationHistory(model.record)
+    if len(history) == 0:
+        solara.Markdown("No generation recorded yet.")
+        return
+    k = len(history) - 1 if frame is None else min(frame, len(history) - 1)
+    with solara.Row():
+        solara.SliderInt(
+            f"Generation {int(history.generations[k])}", value=k, min=0, max=len(history) - 1, on_value=set_frame
+        )
+        solara.Button("Latest", on_click=lambda: set_frame(None), disabled=frame is None)
+    solara.Image(canvas.render_states(history.board(k)), width=f"{size}px")
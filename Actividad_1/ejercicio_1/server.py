@@ -1,22 +1,6 @@
 from game_of_life.model import ConwaysGameOfLife
-from mesa.visualization import (
-    SolaraViz,
-    make_space_component,
-)
-
-from mesa.visualization.components import AgentPortrayalStyle
-
-def agent_portrayal(agent):
-    return AgentPortrayalStyle(
-        color="white" if agent.state == 0 else "black",
-        marker="s",
-        size=30,
-    )
-
-def post_process(ax):
-    ax.set_aspect("equal")
-    ax.set_xticks([])
-    ax.set_yticks([])
+from game_of_life.raster import make_raster_component, make_replay_component
+from mesa.visualization import SolaraViz
 
 model_params = {
     "seed": {
@@ -24,12 +8,18 @@ model_params = {
         "value": 42,
         "label": "Random Seed",
     },
+    "engine": {
+        "type": "Select",
+        "value": "agents",
+        "values": list(ConwaysGameOfLife.ENGINES),
+        "label": "Engine",
+    },
     "width": {
         "type": "SliderInt",
         "value": 50,
         "label": "Width",
         "min": 5,
-        "max": 60,
+        "max": 500,
         "step": 1,
     },
     "height": {
@@ -37,7 +27,7 @@ model_params = {
         "value": 50,
         "label": "Height",
         "min": 5,
-        "max": 60,
+        "max": 500,
         "step": 1,
     },
     "initial_fraction_alive": {
@@ -48,20 +38,25 @@ model_params = {
         "max": 1,
         "step": 0.01,
     },
+    "record": {
+        "type": "InputText",
+        "value": "",
+        "label": "Record to file (empty: off)",
+    },
 }
 
 # Create initial model instance
 gof_model = ConwaysGameOfLife()
 
-space_component = make_space_component(
-        agent_portrayal,
-        draw_grid = False,
-        post_process=post_process
-)
+## El tablero se dibuja como una sola imagen en lugar de un marcador por celula
+space_component = make_raster_component()
+## Slider para volver a cualquier generacion grabada, se lee del archivo de record
+replay_component = make_replay_component()
 
 page = SolaraViz(
     gof_model,
-    components=[space_component],
+    components=[space_component, replay_component],
     model_params=model_params,
     name="Game of Life",
+    render_interval=1,  ## subirlo para dibujar cada n pasos y dejar correr el modelo
 )
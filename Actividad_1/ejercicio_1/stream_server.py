@@ -0,0 +1,54 @@
+"""Run ConwaysGameOfLife and stream the rows as they are drawn over a WebSocket.
+
+Every client gets a FULL frame of the current board when it connects and then
+one binary frame per step with only the cells that changed (see
+streaming/frames.py at the root of the repository for the format), which here
+is the new row of the space-time diagram. The twgl viewer in CG_1/05_Stream
+draws them on the GPU, so wide boards can be watched live.
+
+Needs the websockets package (pip install websockets).
+
+Example:
+    python stream_server.py --width 2000 --height 1000 --engine bitpacked --rule 30 --interval 0.02
+    then open CG_1/05_Stream/stream.html?port=8765 through the CG_1 vite server
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+## El codificador de frames y el servidor estan en streaming/, en la raiz del repositorio
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from streaming.server import stream
+
+from game_of_life.model import ConwaysGameOfLife
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=500)
+    parser.add_argument("--height", type=int, default=500)
+    parser.add_argument("--fraction", type=float, default=0.2, help="initial fraction of ALIVE cells")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--engine", default="sweep", choices=ConwaysGameOfLife.ENGINES)
+    parser.add_argument("--rule", type=int, default=90)
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between steps")
+    parser.add_argument("--steps", type=int, default=None, help="stop after this many steps")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    ## Sin detect_cycles se dibujan todas las filas aunque se repita una
+    model = ConwaysGameOfLife(
+        width=args.width,
+        height=args.height,
+        initial_fraction_alive=args.fraction,
+        seed=args.seed,
+        engine=args.engine,
+        rule=args.rule,
+        detect_cycles=False,
+    )
+    try:
+        asyncio.run(stream(model, args.host, args.port, args.interval, args.steps))
+    finally:
+        model.close()
@@ -0,0 +1,143 @@
+"""Every engine of ConwaysGameOfLife must draw the same space-time diagram as engine="agents".
+
+Run from Actividad_1/ejercicio_1: python -m pytest -q
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+from game_of_life.model import ConwaysGameOfLife
+from game_of_life.recorder import GenerationHistory
+
+## streaming/ esta en la raiz del repositorio, como en stream_server.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from streaming import DELTA, FULL, DeltaEncoder
+
+## (width, height): un solo int de 64 bits, el borde de 64 y un tablero chico
+SIZES = [(7, 5), (20, 13), (65, 6)]
+SEEDS = [0, 1]
+RULES = [90, 30, 110]  ## 90 es lineal (state_at salta con jump_bits), 30 y 110 no
+
+
+def make(engine, width, height, seed, rule, **kwargs):
+    return ConwaysGameOfLife(width=width, height=height, seed=seed, engine=engine, rule=rule, **kwargs)
+
+
+def plain_steps(width, height, seed, rule, n):
+    """The first n + 1 boards of the agents engine, the reference for everything else."""
+    model = make("agents", width, height, seed, rule, detect_cycles=False)
+    boards = [model.get_states()]
+    for _ in range(n):
+        model.step()
+        boards.append(model.get_states())
+    return boards
+
+
+def agents_history(width, height, seed, rule):
+    """Finished space-time diagram of the agents engine."""
+    model = make("agents", width, height, seed, rule, detect_cycles=False)
+    model.advance(height)
+    return model.get_history()
+
+
+@pytest.mark.parametrize("engine", ["sweep", "bitpacked"])
+@pytest.mark.parametrize("width, height", SIZES)
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("rule", RULES)
+def test_engine_matches_agents(engine, width, height, seed, rule):
+    ## Dos pasos de mas para ver que el tablero lleno ya no cambia
+    expected = plain_steps(width, height, seed, rule, height + 1)
+    model = make(engine, width, height, seed, rule, detect_cycles=False)
+    for step, board in enumerate(expected):
+        if step:
+            model.step()
+        assert np.array_equal(model.get_states(), board), f"step {step}"
+    assert np.array_equal(model.get_history(), agents_history(width, height, seed, rule))
+
+
+@pytest.mark.parametrize("engine", ConwaysGameOfLife.ENGINES)
+@pytest.mark.parametrize("rule", RULES)
+@pytest.mark.parametrize("n", [0, 1, 4, 12, 40])
+def test_state_at_matches_steps(engine, rule, n):
+    ## Un modelo mas alto dibuja la fila n con pasos normales
+    width, seed = 20, 3
+    expected = make("sweep", width, n + 1, seed, rule, detect_cycles=False)
+    expected.advance(n)
+    model = make(engine, width, 6, seed, rule, detect_cycles=False)
+    assert np.array_equal(model.state_at(n), expected.get_history()[n])
+    model.advance(6)
+    assert np.array_equal(model.state_at(n), expected.get_history()[n])
+
+
+@pytest.mark.parametrize("engine", ConwaysGameOfLife.ENGINES)
+@pytest.mark.parametrize("n", [0, 3, 13, 20])
+def test_advance_matches_steps(engine, n):
+    width, height, seed, rule = 20, 13, 2, 30
+    model = make(engine, width, height, seed, rule, detect_cycles=False)
+    model.advance(n)
+    assert model.steps == n
+    assert np.array_equal(model.get_states(), plain_steps(width, height, seed, rule, n)[n])
+
+
+@pytest.mark.parametrize("width, height", SIZES)
+@pytest.mark.parametrize("rule", RULES)
+def test_cycle_detection_agrees(width, height, rule):
+    found = {}
+    for engine in ConwaysGameOfLife.ENGINES:
+        model = make(engine, width, height, 5, rule)
+        while model.running and model.steps < 10 * height:
+            model.step()
+        found[engine] = (model.transient, model.period)
+    ## Cuando se llena la ultima fila el tablero ya no cambia: punto fijo
+    assert found["agents"] == (height - 1, 1)
+    assert set(found.values()) == {found["agents"]}, found
+
+
+@pytest.mark.parametrize("engine", ConwaysGameOfLife.ENGINES)
+def test_recorder_round_trip(engine, tmp_path):
+    path = str(tmp_path / "run.bin")
+    model = make(engine, 20, 13, 4, 30, detect_cycles=False, record=path)
+    expected = [model.get_states()]
+    for _ in range(12):
+        model.step()
+        expected.append(model.get_states())
+    model.close()
+
+    history = GenerationHistory(path)
+    assert len(history) == len(expected)
+    for generation, board in enumerate(expected):
+        assert np.array_equal(history[generation], board)
+    replayed = list(history.replay(3, 9))
+    assert [generation for generation, _ in replayed] == list(range(3, 9))
+    assert all(np.array_equal(board, expected[generation]) for generation, board in replayed)
+    with pytest.raises(KeyError):
+        history[len(expected)]
+
+
+def decode(frame, board):
+    """Apply one frame to board (None before the first FULL frame) and return the new board."""
+    if frame[0] == FULL:
+        _, _, width, height = struct.unpack_from("<BIII", frame)
+        return np.frombuffer(frame, dtype=np.uint8, offset=13).reshape(height, width).copy()
+    assert frame[0] == DELTA
+    _, _, count = struct.unpack_from("<BII", frame)
+    index = np.frombuffer(frame, dtype="<u4", count=count, offset=9)
+    board.ravel()[index] = np.frombuffer(frame, dtype=np.uint8, offset=9 + 4 * count)
+    return board
+
+
+@pytest.mark.parametrize("engine", ConwaysGameOfLife.ENGINES)
+def test_stream_round_trip(engine):
+    ## Cada paso solo cambia la fila nueva, asi que despues del primer FULL todo va como DELTA
+    model = make(engine, 40, 30, 6, 110, detect_cycles=False)
+    encoder = DeltaEncoder()
+    board = decode(encoder.full(model.steps, model.board_values()), None)
+    for _ in range(30):
+        model.step()
+        frame = encoder.frame(model.steps, model.board_values())
+        assert frame[0] == DELTA
+        board = decode(frame, board)
+        assert np.array_equal(board, model.board_values())
@@ -30,6 +30,7 @@ class Cell(FixedAgent):
         self.pos = cell.coordinate
         self.state = init_state
         self._next_state = None
+        self.index = None  ## Posicion en model.cell_agents, la asigna el modelo
 
     def determine_state(self):
         """Compute if the cell will be dead or alive at the next tick.  This is
@@ -42,22 +43,19 @@ class Cell(FixedAgent):
         # at the next tick.
         # live_neighbors = sum(neighbor.is_alive for neighbor in self.neighbors)
 
-        
-        alive = ["110", "100", "011","001"] ### Creamos lista con todos los estados que determinan que la celula esta ALIVE
-        
-        info = [n.state for n in self.neighbors] ### Hacemos una lista de solo los 8 estados de los neighbors
-        state = "" ## Inicializamos string vacio para crear el estado determinante
+        ### Indices de los vecinos info[2], info[4] e info[7] (la fila de arriba), calculados una sola vez en el modelo
+        left, center, right = self.model.neighbor_index[self.index]
+        cells = self.model.cell_agents
 
-        state += str(info[2]) ## Sumamos el primer estado del string de la posición de la cordenada 2,2
-        state += str(info[4]) ## Sumamos el primer estado del string de la posición de la cordenada 2,4
-        state += str(info[7]) ## Sumamos el primer estado del string de la posición de la cordenada 2,7
+        ## Estado determinante como numero de 3 bits: izquierda * 4 + centro * 2 + derecha
+        state = cells[left].state << 2 | cells[center].state << 1 | cells[right].state
 
         
         self._next_state = self.state
 
         ### Si la row es igual a la row que pasa el contador se añade en la fila
         
-        if state in alive:
+        if self.model.rule >> state & 1: ## El bit "state" de la regla dice si queda ALIVE
             self._next_state = self.ALIVE
             # print("Final state: 1")
         else:
@@ -68,4 +66,71 @@ class Cell(FixedAgent):
 
     def assume_state(self):
         """Set the state to the new computed state -- computed in step()."""
+        if self._next_state != self.state: ## Actualizamos el hash del tablero solo con las celulas que cambian
+            self.model.state_hash ^= self.model.zobrist[self.index]
         self.state = self._next_state
+
+
+
+class CellView:
+    """Lightweight view of one position of an array-backed model (engine="numpy" or "tiled").
+
+    It holds no state of its own: state is read from and written to
+    model.states, so views are only created when someone asks for them.
+    Supported Cell members: DEAD, ALIVE, pos, x, y, index, state, is_alive,
+    neighbors (as views, same order as Cell.neighbors) and next_state, which is
+    computed from the rule on the current generation. There is no Mesa cell
+    behind a view, so cell, determine_state() and assume_state() do not exist:
+    the model steps the whole array at once.
+    """
+
+    __slots__ = ("model", "pos")
+
+    DEAD = Cell.DEAD
+    ALIVE = Cell.ALIVE
+
+    ## Mismo orden que cell.neighborhood de OrthogonalMooreGrid
+    MOORE = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+    def __init__(self, model, x, y):
+        self.model = model
+        self.pos = (x, y)
+
+    @property
+    def x(self):
+        return self.pos[0]
+
+    @property
+    def y(self):
+        return self.pos[1]
+
+    @property
+    def index(self):
+        ## Igual que Cell.index: grid.all_cells recorre x por fuera e y por dentro
+        return self.pos[0] * self.model.height + self.pos[1]
+
+    @property
+    def state(self):
+        return int(self.model.states[self.pos])
+
+    @state.setter
+    def state(self, value):
+        self.model.states[self.pos] = value
+
+    @property
+    def is_alive(self):
+        return self.state == self.ALIVE
+
+    @property
+    def neighbors(self):
+        x, y = self.pos
+        return [self.model.cell_at(x + dx, y + dy) for dx, dy in self.MOORE]
+
+    @property
+    def next_state(self):
+        """State of this cell in the next generation, from the three cells of the row above."""
+        x, y = self.pos
+        states, width = self.model.states, self.model.width
+        above = (y + 1) % self.model.height
+        state = states[(x - 1) % width, above] << 2 | states[x, above] << 1 | states[(x + 1) % width, above]
+        return self.model.rule >> int(state) & 1
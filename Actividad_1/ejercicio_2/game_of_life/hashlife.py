@@ -0,0 +1,206 @@
+"""Hashlife-style engine: memoized, hash-consed trees of row segments.
+
+Every cell only looks at the row above it, so on the torus row y after t
+generations is the elementary rule applied t times to row y + t (see
+ConwaysGameOfLife._jump_rows). That turns the grid into `height`
+independent one-dimensional automata on a ring of `width` cells, and the
+quadtree of 2-D Hashlife becomes a binary tree over a row:
+
+- A node of level k covers 2**k consecutive cells. Nodes are hash-consed, so
+  equal segments are the same object, and small ones (level <= LEAF_LEVEL)
+  keep their cells as the bits of an int.
+- _result(node, j) is the center half of the node after 2**j generations
+  (j <= k - 2). It is computed from results of the children and memoized,
+  so repeated segments, in space or in time, are only computed once.
+
+To advance a ring by 2**j generations the ring is repeated periodically
+into a node big enough for the light cone, and the first `width` cells of
+its result are read back. Larger step counts go one bit at a time.
+
+The tree only pays off when segments repeat, in space or in time. A random
+ring whose width is not a power of two is unrolled into segments that are all
+different, and each new result costs about as much as BUDGET_RATIO evolve_bits
+steps. So a block of 2**j generations may only compute 2**j // BUDGET_RATIO
+new results; when it runs out, that block is redone with evolve_bits. The
+wasted work is a fraction of plain stepping, so a jump is never much slower
+than evolve_bits, and blocks whose results are already cached stay cheap.
+
+Both tables (nodes and results) are LRU caches of at most cache_size
+entries, evicting the least recently used. Evicting never changes the
+result, it only means some segments may have to be computed again.
+"""
+from collections import OrderedDict
+
+from .kernels import apply_rule, evolve_bits, rotate_bits
+
+LEAF_LEVEL = 6  ## Las hojas guardan hasta 2**6 = 64 celdas en un int
+BUDGET_RATIO = 32  ## Pasos de evolve_bits que vale cada resultado nuevo del arbol
+
+
+class _OverBudget(Exception):
+    """Raised by _result when a block needs more new results than its budget."""
+
+
+class Node:
+    """Segment of 2**level cells. Leaves have bits, the others left and right children."""
+
+    __slots__ = ("level", "bits", "left", "right")
+
+    def __init__(self, level, bits=None, left=None, right=None):
+        self.level = level
+        self.bits = bits
+        self.left = left
+        self.right = right
+
+
+class HashLife:
+    """Advance rings of cells any number of generations under one elementary rule."""
+
+    def __init__(self, rule, cache_size=1_000_000):
+        self.rule = rule
+        self.cache_size = cache_size
+        self._nodes = OrderedDict()  ## (level, bits) o (left, right) -> Node
+        self._results = OrderedDict()  ## (node, j) -> Node
+        self._budget = None  ## Resultados nuevos que le quedan al bloque actual, None sin limite
+
+    def _cached(self, table, key):
+        node = table.get(key)
+        if node is not None:
+            table.move_to_end(key)
+        return node
+
+    def _store(self, table, key, node):
+        table[key] = node
+        if len(table) > self.cache_size:
+            table.popitem(last=False)  ## Sacamos el que se uso hace mas tiempo
+        return node
+
+    def leaf(self, level, bits):
+        key = (level, bits)
+        return self._cached(self._nodes, key) or self._store(self._nodes, key, Node(level, bits=bits))
+
+    def join(self, left, right):
+        """Node made of two nodes of the same level, left one first."""
+        level = left.level + 1
+        if level <= LEAF_LEVEL:
+            return self.leaf(level, left.bits | right.bits << (1 << left.level))
+        key = (left, right)
+        return self._cached(self._nodes, key) or self._store(self._nodes, key, Node(level, left=left, right=right))
+
+    def halves(self, node):
+        if node.bits is None:
+            return node.left, node.right
+        half = 1 << (node.level - 1)
+        return self.leaf(node.level - 1, node.bits & ((1 << half) - 1)), self.leaf(node.level - 1, node.bits >> half)
+
+    def _result(self, node, j):
+        """Center half of node (level k) after 2**j generations, j <= k - 2."""
+        key = (node, j)
+        result = self._cached(self._results, key)
+        if result is not None:
+            return result
+        if self._budget is not None:
+            self._budget -= 1
+            if self._budget < 0:
+                raise _OverBudget
+
+        k = node.level
+        if k <= LEAF_LEVEL:
+            ## Segmento chico: lo avanzamos directo con operaciones de bits, sin dar la vuelta.
+            ## Los bordes se ensucian una celda por paso, pero el centro queda bien.
+            size = 1 << k
+            mask = (1 << size) - 1
+            bits = node.bits
+            for _ in range(1 << j):
+                bits = apply_rule((bits << 1) & mask, bits, bits >> 1, self.rule) & mask
+            quarter = size >> 2
+            result = self.leaf(k - 1, (bits >> quarter) & ((1 << (size >> 1)) - 1))
+        else:
+            a, b = self.halves(node.left)
+            c, d = self.halves(node.right)
+            n0, n1, n2 = self.join(a, b), self.join(b, c), self.join(c, d)
+            if j == k - 2:
+                ## Dos mitades de 2**(j - 1) generaciones cada una
+                r0, r1, r2 = (self._result(n, j - 1) for n in (n0, n1, n2))
+                result = self.join(
+                    self._result(self.join(r0, r1), j - 1),
+                    self._result(self.join(r1, r2), j - 1),
+                )
+            else:
+                ## Paso mas corto: primero solo recortamos el centro, sin avanzar
+                r0, r1, r2 = (self._center(n) for n in (n0, n1, n2))
+                result = self.join(
+                    self._result(self.join(r0, r1), j),
+                    self._result(self.join(r1, r2), j),
+                )
+        return self._store(self._results, key, result)
+
+    def _center(self, node):
+        """Center half of node, without advancing time."""
+        if node.bits is not None:
+            size = 1 << node.level
+            return self.leaf(node.level - 1, (node.bits >> (size >> 2)) & ((1 << (size >> 1)) - 1))
+        _, b = self.halves(node.left)
+        c, _ = self.halves(node.right)
+        return self.join(b, c)
+
+    def _periodic(self, ring, width, level, offset, built):
+        """Node of 2**level cells starting at cell offset of the ring repeated forever."""
+        offset %= width
+        key = (level, offset)
+        node = built.get(key)
+        if node is not None:
+            return node
+        if level <= LEAF_LEVEL:
+            size = 1 << level
+            bits = rotate_bits(ring, width, offset)  ## bit x = celda offset + x
+            copies = width
+            while copies < size:
+                bits |= bits << copies
+                copies *= 2
+            node = self.leaf(level, bits & ((1 << size) - 1))
+        else:
+            half = 1 << (level - 1)
+            node = self.join(
+                self._periodic(ring, width, level - 1, offset, built),
+                self._periodic(ring, width, level - 1, offset + half, built),
+            )
+        built[key] = node
+        return node
+
+    def _read(self, node, count):
+        """First count cells of node, packed into an int."""
+        if node.bits is not None:
+            return node.bits & ((1 << count) - 1)
+        half = 1 << (node.level - 1)
+        if count <= half:
+            return self._read(node.left, count)
+        return self._read(node.left, half) | self._read(node.right, count - half) << half
+
+    def advance_ring(self, bits, width, steps):
+        """Return a packed ring of width cells steps generations later."""
+        j = 0
+        while steps:
+            if steps & 1:
+                try:
+                    bits = self._advance_block(bits, width, j)
+                except _OverBudget:
+                    ## El arbol no esta reusando segmentos: este bloque va paso por paso
+                    bits = evolve_bits(bits, width, self.rule, 1 << j)
+            steps >>= 1
+            j += 1
+        return bits
+
+    def _advance_block(self, bits, width, j):
+        """Advance a ring 2**j generations with the tree, raising _OverBudget if it is not memoizing."""
+        ## Nivel con centro >= width y al menos 2**(j + 2) celdas para el cono de luz
+        level = max(j + 2, 2)
+        while (1 << (level - 1)) < width:
+            level += 1
+        quarter = 1 << (level - 2)
+        self._budget = (1 << j) // BUDGET_RATIO
+        try:
+            root = self._periodic(bits, width, level, -quarter, {})
+            return self._read(self._result(root, j), width)
+        finally:
+            self._budget = None
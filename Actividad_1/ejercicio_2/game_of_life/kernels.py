@@ -0,0 +1,155 @@
+"""Array kernels to step the automaton without going through the Cell agents."""
+import numpy as np
+
+### Regla original: los estados "110", "100", "011" y "001" de la fila de arriba dejan la celula ALIVE
+DEFAULT_RULE = 90
+
+### Reglas lineales: la celula es el XOR de un subconjunto de (izquierda, centro, derecha).
+### Cada offset dice de que celda (x + offset) de la fila de arriba se toma el valor.
+LINEAR_RULES = {
+    0: (),
+    60: (-1, 0),
+    90: (-1, 1),
+    102: (0, 1),
+    150: (-1, 0, 1),
+    170: (1,),
+    204: (0,),
+    240: (-1,),
+}
+
+
+def rule_patterns(rule):
+    """Return the (left, center, right) strings that make a cell ALIVE under a Wolfram rule.
+
+    Bit i of the rule number is the next state for the pattern whose binary
+    value is i, so rule 90 gives ["001", "011", "100", "110"].
+    """
+    if not 0 <= rule <= 255:
+        raise ValueError(f"Rule must be between 0 and 255, got {rule}")
+    return [format(i, "03b") for i in range(8) if rule >> i & 1]
+
+
+def pattern_table(patterns):
+    """Build a lookup table indexed by the 3-bit neighbor pattern.
+
+    The index is left * 4 + center * 2 + right, which is the same string the
+    Cell agent builds from info[2], info[4] and info[7].
+    """
+    table = np.zeros(8, dtype=np.uint8)
+    for pattern in patterns:
+        table[int(pattern, 2)] = 1
+    return table
+
+
+def rule_table(rule):
+    """Lookup table for a Wolfram rule number."""
+    return pattern_table(rule_patterns(rule))
+
+
+def step_array(states, table, out=None):
+    """Compute the next generation of a (width, height) torus of 0/1 states.
+
+    Every cell looks at the three cells in the row above it (y + 1), at
+    x - 1, x and x + 1, wrapping around the edges like the torus grid.
+    If out is given the result is written there instead of a new array.
+    states can also be a stack of grids, (replicas, width, height).
+    """
+    up = np.roll(states, -1, axis=-1)  ## fila de arriba (y + 1)
+    pattern = np.roll(up, 1, axis=-2) << 2  ## x - 1
+    pattern |= up << 1
+    pattern |= np.roll(up, -1, axis=-2)  ## x + 1
+    return np.take(table, pattern, out=out)
+
+
+def pack_row(row):
+    """Pack a row of 0/1 states into an int, cell x goes to bit x."""
+    packed = np.packbits(np.asarray(row, dtype=np.uint8), bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+def unpack_row(bits, width):
+    """Inverse of pack_row, returns a uint8 array of length width."""
+    raw = np.frombuffer(bits.to_bytes((width + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:width]
+
+
+def step_bits(bits, width, rule):
+    """Apply an elementary rule to a packed row, wrapping around the edges.
+
+    Every bit operation updates the whole row at once: the rule is written as
+    the OR of the patterns it turns ALIVE, and each pattern is the AND of the
+    left, center and right rows (or their complements).
+    """
+    mask = (1 << width) - 1
+    left = ((bits << 1) | (bits >> (width - 1))) & mask  ## bit x = celda x - 1
+    right = (bits >> 1) | ((bits & 1) << (width - 1))  ## bit x = celda x + 1
+    return apply_rule(left, bits, right, rule) & mask
+
+
+def apply_rule(left, center, right, rule):
+    """Combine the packed left, center and right rows with a rule (the result is not masked)."""
+    result = 0
+    for pattern in range(8):
+        if rule >> pattern & 1:
+            term = left if pattern & 4 else ~left
+            term &= center if pattern & 2 else ~center
+            term &= right if pattern & 1 else ~right
+            result |= term
+    return result
+
+
+def evolve_bits(bits, width, rule, steps):
+    """Apply step_bits steps times and return the final packed row."""
+    for _ in range(steps):
+        bits = step_bits(bits, width, rule)
+    return bits
+
+
+def rotate_bits(bits, width, offset):
+    """Rotate a packed row so that bit x takes the value of cell (x + offset) mod width."""
+    shift = -offset % width
+    if shift == 0:
+        return bits
+    mask = (1 << width) - 1
+    return ((bits << shift) | (bits >> (width - shift))) & mask
+
+
+def jump_bits(bits, width, rule, steps):
+    """Return the packed row steps generations later for a linear rule.
+
+    For a linear rule, applying it 2**k times is the same XOR of rotated rows
+    with every offset multiplied by 2**k, so steps generations only need one
+    such XOR per bit set in steps: O(width * log(steps)) instead of
+    O(width * steps).
+    """
+    offsets = LINEAR_RULES[rule]
+    power = 1  ## 2**k mod width
+    while steps:
+        if steps & 1:
+            result = 0
+            for offset in offsets:
+                result ^= rotate_bits(bits, width, offset * power)
+            bits = result
+        steps >>= 1
+        power = power * 2 % width
+    return bits
+
+
+def step_band(states, x0, x1, table, out):
+    """Compute the next generation of the columns x0 <= x < x1 only, writing them into out.
+
+    Besides its own columns the band reads one halo column on each side,
+    x0 - 1 and x1 (wrapping around), which belong to the neighboring bands.
+    """
+    width = states.shape[0]
+    if 0 < x0 and x1 < width:
+        band = states[x0 - 1 : x1 + 1]  ## columnas de la banda + halo de cada lado, sin copiar
+    else:
+        band = states[np.arange(x0 - 1, x1 + 1) % width]  ## la banda da la vuelta al toro
+    target = out[x0:x1]
+    ## La fila y lee la fila y + 1, y la ultima fila lee la fila 0
+    for rows, up in ((target[:, :-1], band[:, 1:]), (target[:, -1:], band[:, :1])):
+        pattern = up[:-2] << 2  ## x - 1
+        pattern |= up[1:-1] << 1
+        pattern |= up[2:]  ## x + 1
+        np.take(table, pattern, out=rows)
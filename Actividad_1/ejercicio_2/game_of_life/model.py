@@ -1,14 +1,136 @@
+import random
+import time
+import sys
+
+import numpy as np
 from mesa import Model
+from mesa.datacollection import DataCollector
 from mesa.discrete_space import OrthogonalMooreGrid
-from .agent import Cell
+from .agent import Cell, CellView
+from .hashlife import HashLife
+from .recorder import GenerationRecorder
+from .tiled import TiledEngine
+from .kernels import (
+    DEFAULT_RULE,
+    LINEAR_RULES,
+    jump_bits,
+    pack_row,
+    rule_table,
+    step_array,
+    step_bits,
+    unpack_row,
+)
 
 
 class ConwaysGameOfLife(Model):
     """Represents the 2-dimensional array of cells in Conway's Game of Life."""
 
-    def __init__(self, width=50, height=50, initial_fraction_alive=0.2, seed=None):
-        """Create a new playing area of (width, height) cells."""
-        super().__init__(seed=seed)
+    ENGINES = ("agents", "numpy", "bitpacked", "ensemble", "tiled", "hashlife")
+    ## Fases que se miden con profile: los dos pasos de las celulas (engine="agents"),
+    ## el paso vectorizado de los demas engines y el fin de generacion (hash y grabacion)
+    PHASES = ("determine_state", "assume_state", "kernel", "end_generation")
+
+    def __init__(self, width=50, height=50, initial_fraction_alive=0.2, seed=None, engine="agents", rule=DEFAULT_RULE,
+                 detect_cycles=True, cycle_history=10_000, record=None, workers=None,
+                 hashlife_cache=1_000_000, profile=False):
+        """Create a new playing area of (width, height) cells.
+
+        engine selects how the grid is stepped:
+        - "agents": one Cell agent per position on an OrthogonalMooreGrid (used by server.py)
+        - "numpy": states and next states live in two (width, height) uint8 arrays
+          owned by the model, no agents are created. cell_at() / cell_views()
+          give CellView objects on demand.
+        - "bitpacked": every row is packed into an int and stepped with bitwise operations
+        - "ensemble": seed and/or initial_fraction_alive are lists, one replica per
+          entry. All replicas live in one (replicas, width, height) array and are
+          advanced together by the same vectorized step. Replica r starts from the
+          same board as a single model built with seed[r].
+        - "tiled": like "numpy", but the arrays are in shared memory and every step
+          is computed by `workers` processes (default: all cores), each one owning
+          a band of columns. Call close() when done to stop the workers.
+        - "hashlife": steps like "bitpacked", but advance() and state_at() use the
+          memoized tree engine in hashlife.py for the rules that are not linear,
+          so very long jumps on regular patterns take time logarithmic in the
+          number of generations (on irregular ones it falls back to plain
+          stepping). Linear rules use jump_bits as in every other engine.
+          hashlife_cache bounds its node and result tables.
+
+        rule is the Wolfram number (0-255) applied to the (left, center, right)
+        cells of the row above. The default, 90, is the original rule.
+
+        With detect_cycles the model hashes every generation and stops (running =
+        False) as soon as one repeats, see _check_cycle. cycle_history bounds how
+        many generations are remembered. An ensemble stops when the whole stack
+        repeats.
+
+        record is an optional file path: every generation is appended to it,
+        bit-packed, and can be read back with recorder.GenerationHistory.
+
+        With profile every step is split in phases and timed (see phase_times),
+        and a DataCollector records them as model reporters in milliseconds.
+        """
+        super().__init__(seed=None if engine == "ensemble" else seed)
+
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {self.ENGINES}")
+
+        self.width = width
+        self.height = height
+        self.engine = engine
+        self.rule = rule
+        self.table = rule_table(rule)
+        self.detect_cycles = detect_cycles
+        self.cycle_history = cycle_history
+        self.transient = None
+        self.period = None
+        self._seen = {}  ## hash de la generacion -> paso en el que aparecio
+        self.record = record or None  ## "" (campo vacio en server.py) es sin grabar
+        self.recorder = None
+        self.profile = profile
+        self.phase_times = {}  ## fase -> segundos que tardo en el ultimo paso
+        if profile:
+            self.datacollector = DataCollector(model_reporters={
+                f"{phase} ms": (lambda m, phase=phase: m.phase_times.get(phase, 0.0) * 1000)
+                for phase in self.PHASES
+            })
+
+        if engine == "ensemble":
+            seeds = list(seed) if np.iterable(seed) else [seed]
+            fractions = list(initial_fraction_alive) if np.iterable(initial_fraction_alive) else [initial_fraction_alive]
+            ## Si uno de los dos es un solo valor se repite para todas las replicas
+            if len(seeds) == 1:
+                seeds = seeds * len(fractions)
+            if len(fractions) == 1:
+                fractions = fractions * len(seeds)
+            if len(seeds) != len(fractions):
+                raise ValueError(f"Got {len(seeds)} seeds but {len(fractions)} initial fractions")
+            self.seeds = seeds
+            self.fractions = fractions
+            self.states = np.stack([
+                self._random_states(self._replica_rng(s), fraction) for s, fraction in zip(seeds, fractions)
+            ])
+            self.next_states = np.zeros_like(self.states)
+            self.running = True
+            self._end_generation()
+            return
+
+        if engine in ("numpy", "bitpacked", "tiled", "hashlife"):
+            self.states = self._random_states(self.rng, initial_fraction_alive)
+            if engine in ("bitpacked", "hashlife"):
+                ## rows[y] guarda la fila y, la celda x en el bit x
+                self.rows = self._pack_rows(self.states)
+                del self.states
+                if engine == "hashlife":
+                    self.hashlife = HashLife(rule, cache_size=hashlife_cache)
+            elif engine == "tiled":
+                self.tiles = TiledEngine(self.states, self.table, workers)
+                self.states, self.next_states = self.tiles.buffers()
+            else:
+                ## Segundo buffer para el siguiente estado, se intercambian en cada paso
+                self.next_states = np.zeros_like(self.states)
+            self.running = True
+            self._end_generation()
+            return
 
         """Grid where cells are connected to their 8 neighbors.
 
@@ -27,17 +149,231 @@ class ConwaysGameOfLife(Model):
         # Place a cell at each location, with some initialized to
         # ALIVE and some to DEAD.
 
-        for i, cell in enumerate(self.grid.all_cells):
-            Cell(
-                self,
-                cell,
-                init_state=(
-                    Cell.ALIVE
-                    if self.random.random() < initial_fraction_alive
-                    else Cell.DEAD
-                ),
-            )
+        ## Los estados se sortean de una vez con numpy y las celulas se crean en bloque
+        cells = list(self.grid.all_cells)
+        states = self._random_states(self.rng, initial_fraction_alive).ravel()
+        self.cell_agents = list(Cell.create_agents(
+            self,
+            len(cells),
+            cells,
+            init_state=np.where(states == 1, Cell.ALIVE, Cell.DEAD).tolist(),
+        ))
+
+        ## Tabla de vecinos calculada una sola vez: para cada celula los indices en cell_agents
+        ## de (x - 1, y + 1), (x, y + 1) y (x + 1, y + 1), que son info[2], info[4] e info[7]
+        index_of = {}
+        for i, agent in enumerate(self.cell_agents):
+            agent.index = i
+            index_of[agent.pos] = i
+        self.neighbor_index = [
+            tuple(index_of[((x + dx) % width, (y + 1) % height)] for dx in (-1, 0, 1))
+            for x, y in (agent.pos for agent in self.cell_agents)
+        ]
+
+        ## Llaves aleatorias por celula para el hash incremental (Zobrist) del tablero,
+        ## con su propio generador para no cambiar la secuencia de self.random
+        keys = random.Random(len(self.cell_agents))
+        self.zobrist = [keys.getrandbits(64) for _ in self.cell_agents]
+        self._rehash_agents()
+
+        ## Tabla inversa: las celulas que tienen a cada celula como vecina de arriba
+        self.dependents = [[] for _ in self.cell_agents]
+        for i, neighbors in enumerate(self.neighbor_index):
+            for j in set(neighbors):
+                self.dependents[j].append(i)
+        self.active = set(range(len(self.cell_agents)))  ## En el primer paso todas estan activas
         self.running = True
+        self._end_generation()
+
+    def close(self):
+        """Release the worker processes and shared memory of engine="tiled" and close the recording."""
+        if self.engine == "tiled":
+            self.tiles.close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _random_states(self, rng, initial_fraction_alive):
+        """Draw a (width, height) board of 0/1 from a numpy Generator in one call.
+
+        The board is laid out like grid.all_cells (x outside, y inside) so the
+        same seed gives the same board in every engine.
+        """
+        draws = rng.random((self.width, self.height))
+        return (draws < initial_fraction_alive).astype(np.uint8)
+
+    @staticmethod
+    def _replica_rng(seed):
+        """numpy Generator for one ensemble replica, seeded the way mesa seeds Model.rng."""
+        try:
+            return np.random.default_rng(seed)
+        except TypeError:
+            return np.random.default_rng(random.Random(seed).randint(0, sys.maxsize))
+
+    def get_states(self):
+        """Return the current generation as a (width, height) array of 0/1.
+
+        For engine="ensemble" the array is (replicas, width, height).
+        """
+        if self.engine in ("numpy", "ensemble", "tiled"):
+            return self.states.copy()
+        if self.engine in ("bitpacked", "hashlife"):
+            return self._unpack_rows(self.rows)
+        states = np.zeros((self.width, self.height), dtype=np.uint8)
+        for agent in self.agents:
+            states[agent.pos] = agent.state
+        return states
+
+    def board_values(self):
+        """Board as a (height, width) uint8 array, y = 0 in row 0, for the stream_server.py viewer.
+
+        For engine="ensemble" the first replica is streamed.
+        """
+        states = self.get_states()
+        if states.ndim == 3:
+            states = states[0]
+        return states.T
+
+    def cell_at(self, x, y):
+        """Return the cell at (x, y): the Cell agent, or a CellView for the array engines."""
+        if self.engine in ("numpy", "tiled"):
+            return CellView(self, x % self.width, y % self.height)
+        if self.engine == "agents":
+            return self.grid[(x % self.width, y % self.height)].agents[0]
+        raise ValueError(f"Engine {self.engine!r} has no per-cell objects, use get_states()")
+
+    def cell_views(self):
+        """Iterate over every cell, creating the CellView objects lazily for engine="numpy"."""
+        if self.engine == "agents":
+            yield from self.cell_agents
+            return
+        for x in range(self.width):
+            for y in range(self.height):
+                yield self.cell_at(x, y)
+
+    def set_states(self, states):
+        """Replace the current generation with a (width, height) array of 0/1."""
+        states = np.asarray(states, dtype=np.uint8)
+        if self.engine in ("numpy", "ensemble", "tiled"):
+            self.states[...] = states
+        elif self.engine in ("bitpacked", "hashlife"):
+            self.rows = self._pack_rows(states)
+        else:
+            for agent in self.agents:
+                agent.state = int(states[agent.pos])
+            self._rehash_agents()
+            self.active = set(range(len(self.cell_agents)))
+        self._reset_cycles()
+
+    def _pack_rows(self, states):
+        return [pack_row(states[:, y]) for y in range(self.height)]
+
+    def _unpack_rows(self, rows):
+        return np.stack([unpack_row(bits, self.width) for bits in rows], axis=1)
+
+    def _jump_states(self, states, n):
+        """Apply _jump_rows to a (width, height) board or to every replica of an ensemble."""
+        if states.ndim == 3:
+            return np.stack([self._jump_states(replica, n) for replica in states])
+        return self._unpack_rows(self._jump_rows(self._pack_rows(states), n))
+
+    def _jump_rows(self, rows, n):
+        """Row y after n generations is the rule applied n times to row y + n."""
+        ## Las reglas lineales saltan mas rapido con jump_bits que con el arbol
+        if self.engine == "hashlife" and self.rule not in LINEAR_RULES:
+            return [
+                self.hashlife.advance_ring(rows[(y + n) % self.height], self.width, n)
+                for y in range(self.height)
+            ]
+        return [
+            jump_bits(rows[(y + n) % self.height], self.width, self.rule, n)
+            for y in range(self.height)
+        ]
+
+    def _rehash_agents(self):
+        """Recompute the Zobrist hash of the board from scratch (engine="agents")."""
+        self.state_hash = 0
+        for agent in self.cell_agents:
+            if agent.state == Cell.ALIVE:
+                self.state_hash ^= self.zobrist[agent.index]
+
+    def _state_hash(self):
+        """Hash of the current generation, used to find repeated generations."""
+        if self.engine == "agents":
+            return self.state_hash  ## Se actualiza en Cell.assume_state
+        if self.engine in ("bitpacked", "hashlife"):
+            return hash(tuple(self.rows))
+        return hash(self.states.tobytes())
+
+    def _end_generation(self):
+        """Called after every new generation: records it if there is a recorder, then looks for cycles."""
+        if self.record is not None:
+            states = self.get_states()
+            if self.recorder is None:
+                self.recorder = GenerationRecorder(self.record, states.shape)
+            self.recorder.append(self.steps, states)
+        self._check_cycle()
+
+    def _check_cycle(self):
+        """Record the current generation and stop the model when it repeats one.
+
+        When a repeat is found self.transient is the step where the cycle
+        starts, self.period its length (1 for a fixed point) and running is set
+        to False. Only the last cycle_history generations are kept, so longer
+        cycles are not detected.
+        """
+        if not self.detect_cycles or self.period is not None:
+            return
+        key = self._state_hash()
+        first = self._seen.get(key)
+        if first is not None:
+            self.transient = first
+            self.period = self.steps - first
+            self.running = False
+            return
+        self._seen[key] = self.steps
+        if len(self._seen) > self.cycle_history:
+            del self._seen[next(iter(self._seen))]  ## Sacamos la generacion mas vieja
+
+    def _reset_cycles(self):
+        """Forget the recorded generations, after the grid was replaced or jumped ahead."""
+        self._seen = {}
+        self.transient = None
+        self.period = None
+        self._end_generation()
+
+    def advance(self, n):
+        """Advance the model n generations.
+
+        Linear rules (see LINEAR_RULES, the default rule 90 is one of them) jump
+        straight to the result in O(width * height * log n) in every engine.
+        With engine="hashlife" the other rules go through the memoized tree
+        engine. Otherwise it falls back to calling step() n times.
+        """
+        if self.rule not in LINEAR_RULES and self.engine != "hashlife":
+            for _ in range(n):
+                self.step()
+            return
+        self.steps += n
+        if self.engine in ("bitpacked", "hashlife"):
+            self.rows = self._jump_rows(self.rows, n)
+            self._reset_cycles()
+        else:
+            self.set_states(self._jump_states(self.get_states(), n))
+
+    def state_at(self, n):
+        """Return generation n as a (width, height) array without changing the model.
+
+        n counts from the initial grid, so it cannot be smaller than self.steps.
+        """
+        if n < self.steps:
+            raise ValueError(f"Generation {n} is before the current step {self.steps}")
+        n -= self.steps
+        states = self.get_states()
+        if self.rule in LINEAR_RULES or self.engine == "hashlife":
+            return self._jump_states(states, n)
+        for _ in range(n):
+            states = step_array(states, self.table)
+        return states
 
     
     def step(self):
@@ -45,8 +381,37 @@ class ConwaysGameOfLife(Model):
 
         - First, all cells assume their next state (whether they will be dead or alive)
         - Then, all cells change state to their next state.
+
+        With profile the time of each phase is left in phase_times and collected.
         """
-        
-        self.agents.do("determine_state") ## Creamos contador para ir cambiado de row al poner set element
-        self.agents.do("assume_state")
+        start = time.perf_counter()
+        if self.engine in ("numpy", "ensemble"):
+            step_array(self.states, self.table, out=self.next_states)
+            self.states, self.next_states = self.next_states, self.states
+        elif self.engine == "tiled":
+            self.tiles.step()
+            self.states, self.next_states = self.tiles.buffers()
+        elif self.engine in ("bitpacked", "hashlife"):
+            ## La fila y toma la regla aplicada a la fila y + 1
+            self.rows = [step_bits(bits, self.width, self.rule) for bits in self.rows[1:] + self.rows[:1]]
+        else:
+            ## Solo evaluamos las celulas cuya fila de arriba cambio en el paso anterior,
+            ## las demas tienen los mismos vecinos y no pueden cambiar
+            active = [self.cell_agents[i] for i in self.active]
+            for cell in active:
+                cell.determine_state()
+            determined = time.perf_counter()
+            changed = [cell for cell in active if cell._next_state != cell.state]
+            for cell in changed:
+                cell.assume_state()
+            self.active = {i for cell in changed for i in self.dependents[cell.index]}
+        stepped = time.perf_counter()
+        self._end_generation()
+        if self.profile:
+            if self.engine == "agents":
+                self.phase_times = {"determine_state": determined - start, "assume_state": stepped - determined}
+            else:
+                self.phase_times = {"kernel": stepped - start}
+            self.phase_times["end_generation"] = time.perf_counter() - stepped
+            self.datacollector.collect(self)
         # print(next(iter(self.grid.all_cells)).agents[0].state)
@@ -0,0 +1,93 @@
+"""Record generations to disk, bit-packed, and read them back without re-running the model.
+
+A recording is three files next to each other:
+- path: the frames, one np.packbits of the board per recorded generation, all the same size
+- path + ".idx": int64 generation number of every frame, in the same order
+- path + ".json": shape of the board and size in bytes of one frame
+
+GenerationRecorder appends to them while the model runs. GenerationHistory
+memory-maps them, so any generation can be read back in O(1) without
+loading the whole file.
+"""
+import json
+import os
+
+import numpy as np
+
+
+class GenerationRecorder:
+    """Append generations of a model to a recording."""
+
+    def __init__(self, path, shape):
+        self.path = path
+        self.shape = tuple(shape)
+        self.frame_bytes = (int(np.prod(self.shape)) + 7) // 8
+        with open(path + ".json", "w") as f:
+            json.dump({"shape": self.shape, "frame_bytes": self.frame_bytes}, f)
+        self._frames = open(path, "wb")
+        self._index = open(path + ".idx", "wb")
+
+    def append(self, generation, states):
+        """Write one generation; states must have the shape given to the constructor."""
+        self._frames.write(np.packbits(states.ravel()).tobytes())
+        self._index.write(np.int64(generation).tobytes())
+        ## flush para que GenerationHistory pueda leerlo mientras el modelo sigue corriendo
+        self._frames.flush()
+        self._index.flush()
+
+    def close(self):
+        self._frames.close()
+        self._index.close()
+
+
+class GenerationHistory:
+    """Read-only, memory-mapped view of a recording."""
+
+    def __init__(self, path):
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        self.shape = tuple(meta["shape"])
+        self.frame_bytes = meta["frame_bytes"]
+        self.size = int(np.prod(self.shape))
+        ## Solo frames completos, por si el archivo se esta escribiendo
+        count = min(os.path.getsize(path) // self.frame_bytes, os.path.getsize(path + ".idx") // 8)
+        if count == 0:
+            self.frames = np.zeros((0, self.frame_bytes), dtype=np.uint8)
+            self.generations = np.zeros(0, dtype=np.int64)
+        else:
+            self.frames = np.memmap(path, dtype=np.uint8, mode="r", shape=(count, self.frame_bytes))
+            self.generations = np.memmap(path + ".idx", dtype=np.int64, mode="r", shape=(count,))
+
+    def __len__(self):
+        return len(self.generations)
+
+    def frame_of(self, generation):
+        """Position of the last frame recorded for generation, KeyError if it was not recorded."""
+        if len(self) == 0:
+            raise KeyError(generation)
+        ## Caso normal: se grabo cada paso seguido, la posicion sale directo
+        k = generation - int(self.generations[0])
+        if 0 <= k < len(self) and self.generations[k] == generation and (
+            k + 1 == len(self) or self.generations[k + 1] != generation
+        ):
+            return k
+        k = int(np.searchsorted(self.generations, generation, side="right")) - 1
+        if k < 0 or self.generations[k] != generation:
+            raise KeyError(generation)
+        return k
+
+    def __getitem__(self, generation):
+        """Return the board of a recorded generation as a uint8 array of 0/1."""
+        return self.board(self.frame_of(generation))
+
+    def board(self, k):
+        """Return the board stored in frame k (0 is the first frame recorded)."""
+        return np.unpackbits(self.frames[k], count=self.size).reshape(self.shape)
+
+    def replay(self, start=None, stop=None):
+        """Yield (generation, board) for every recorded generation in [start, stop)."""
+        ## Las generaciones estan en orden: los limites salen del mismo indice que usa frame_of
+        first = 0 if start is None else int(np.searchsorted(self.generations, start, side="left"))
+        last = len(self) if stop is None else int(np.searchsorted(self.generations, stop, side="left"))
+        for k in range(first, last):
+            yield int(self.generations[k]), self.board(k)
@@ -0,0 +1,104 @@
+"""Multi-process backend: the torus is split in bands of columns, one worker process per band.
+
+Both generations (current and next) live in multiprocessing.shared_memory,
+so the workers never send cells through pipes. Each generation every worker
+reads its own columns plus the two halo columns of its neighbors from the
+current buffer and writes its columns of the next buffer. The pipes only
+carry the "step" / "done" messages that keep the workers in lockstep.
+"""
+import os
+import weakref
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .kernels import step_band
+
+
+def _worker(pipe, names, shape, table, x0, x1):
+    """Loop of one worker: wait for the index of the current buffer, step the band, answer."""
+    memories = [SharedMemory(name=name) for name in names]
+    buffers = [np.ndarray(shape, dtype=np.uint8, buffer=memory.buf) for memory in memories]
+    try:
+        while True:
+            current = pipe.recv()
+            if current is None:
+                break
+            step_band(buffers[current], x0, x1, table, out=buffers[1 - current])
+            pipe.send(True)
+    finally:
+        del buffers
+        for memory in memories:
+            memory.close()
+
+
+def _shutdown(pipes, processes, memories):
+    for pipe in pipes:
+        try:
+            pipe.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for memory in memories:
+        try:
+            memory.close()
+        except BufferError:
+            pass  ## Todavia hay arreglos apuntando al buffer, se libera cuando desaparezcan
+        memory.unlink()
+
+
+class TiledEngine:
+    """Steps a (width, height) torus of 0/1 states with one worker process per band of columns."""
+
+    def __init__(self, states, table, workers=None):
+        self.shape = states.shape
+        width = self.shape[0]
+        workers = max(1, min(workers or os.cpu_count() or 1, width))
+
+        self._memories = [SharedMemory(create=True, size=max(states.nbytes, 1)) for _ in range(2)]
+        self._buffers = [np.ndarray(self.shape, dtype=np.uint8, buffer=memory.buf) for memory in self._memories]
+        self._buffers[0][...] = states
+        self.current = 0
+
+        context = get_context()
+        bounds = np.linspace(0, width, workers + 1).astype(int)
+        self._pipes = []
+        self._processes = []
+        for x0, x1 in zip(bounds[:-1], bounds[1:]):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(child, [memory.name for memory in self._memories], self.shape, table, int(x0), int(x1)),
+                daemon=True,
+            )
+            process.start()
+            self._pipes.append(parent)
+            self._processes.append(process)
+
+        ## Si el modelo se borra sin llamar close() igual se liberan los procesos y la memoria
+        self._finalizer = weakref.finalize(self, _shutdown, self._pipes, self._processes, self._memories)
+
+    @property
+    def workers(self):
+        return len(self._processes)
+
+    def buffers(self):
+        """Return (current generation, next generation) as arrays backed by the shared memory."""
+        return self._buffers[self.current], self._buffers[1 - self.current]
+
+    def step(self):
+        """Advance every band one generation and wait until all workers are done."""
+        for pipe in self._pipes:
+            pipe.send(self.current)
+        for pipe in self._pipes:
+            pipe.recv()
+        self.current = 1 - self.current
+
+    def close(self):
+        """Stop the workers and release the shared memory."""
+        self._buffers = []
+        self._finalizer()
@@ -0,0 +1,135 @@
+"""Headless parameter sweep for ConwaysGameOfLife.
+
+Every combination of seed, initial_fraction_alive, width and height is run in
+a process pool. Each finished run is appended as one JSON line to the output
+file, so the summaries can be read while the sweep is still going and a
+crashed sweep can be started again with the same command: runs that are
+already in the file with the same engine, rule and --steps are skipped.
+
+Example:
+    python sweep.py --seeds 0-999 --fractions 0.1 0.2 0.5 --widths 50 --heights 50 --out runs.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+from multiprocessing import Pool
+
+from game_of_life.model import ConwaysGameOfLife
+
+PARAMS = ("seed", "initial_fraction_alive", "width", "height")
+## Ademas de los parametros del tablero, una corrida se distingue por como se corrio
+SETTINGS = ("engine", "rule", "max_steps")
+
+
+def run_key(params):
+    """Identify a run by its parameters and settings, used to skip finished runs when resuming."""
+    return tuple(params[name] for name in PARAMS + SETTINGS)
+
+
+def run_one(params, max_steps=1000, engine="numpy", rule=90):
+    """Run one model until it repeats a generation or max_steps is reached.
+
+    Returns the parameters, engine, rule and max_steps plus:
+    - final_population: ALIVE cells in the last generation
+    - steps_to_steady: first step of the cycle, None if no repeat was found
+    - period: length of the cycle (1 for a fixed point), None if no repeat was found
+    - steps: how many steps were run
+    """
+    ## El modelo se detiene solo (running = False) cuando repite una generacion
+    model = ConwaysGameOfLife(engine=engine, rule=rule, cycle_history=max_steps + 1, **params)
+    while model.running and model.steps < max_steps:
+        model.step()
+    return {
+        **params,
+        "engine": engine,
+        "rule": rule,
+        "max_steps": max_steps,
+        "final_population": int(model.get_states().sum()),
+        "steps_to_steady": model.transient,
+        "period": model.period,
+        "steps": model.steps,
+    }
+
+
+def _run_job(job):
+    params, max_steps, engine, rule = job
+    return run_one(params, max_steps=max_steps, engine=engine, rule=rule)
+
+
+def load_done(path):
+    """Return the keys of the runs already written to path (ignores a half-written last line)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                done.add(run_key(json.loads(line)))
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def run_sweep(seeds, fractions, widths, heights, out, processes=None, max_steps=1000, engine="numpy", rule=90):
+    """Run every combination that is not already in out and stream the results to it."""
+    if engine == "tiled":
+        raise ValueError('engine="tiled" can not run inside the process pool, use "numpy" or "bitpacked"')
+    done = load_done(out)
+    jobs = [
+        (dict(zip(PARAMS, combo)), max_steps, engine, rule)
+        for combo in itertools.product(seeds, fractions, widths, heights)
+        if combo + (engine, rule, max_steps) not in done
+    ]
+    total = len(seeds) * len(fractions) * len(widths) * len(heights)
+    print(f"{total - len(jobs)} runs already done, {len(jobs)} to go")
+    if not jobs:
+        return
+    with Pool(processes) as pool, open(out, "a+") as f:
+        ## Si el proceso murio a medio escribir una linea, empezamos en una linea nueva
+        if f.tell() > 0:
+            f.seek(f.tell() - 1)
+            if f.read(1) != "\n":
+                f.write("\n")
+        for result in pool.imap_unordered(_run_job, jobs):
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+
+
+def parse_ints(values):
+    """Accept both lists (1 2 3) and ranges (0-99) on the command line."""
+    result = []
+    for value in values:
+        if "-" in value:
+            start, end = value.split("-")
+            result.extend(range(int(start), int(end) + 1))
+        else:
+            result.append(int(value))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seeds", nargs="+", default=["0-9"])
+    parser.add_argument("--fractions", nargs="+", type=float, default=[0.2])
+    parser.add_argument("--widths", nargs="+", default=["50"])
+    parser.add_argument("--heights", nargs="+", default=["50"])
+    parser.add_argument("--steps", type=int, default=1000, help="max steps per run")
+    ## "tiled" no: los procesos del Pool son daemon y no pueden arrancar los workers de cada tablero
+    parser.add_argument("--engine", default="numpy", choices=[e for e in ConwaysGameOfLife.ENGINES if e != "tiled"])
+    parser.add_argument("--rule", type=int, default=90)
+    parser.add_argument("--processes", type=int, default=None, help="default: all cores")
+    parser.add_argument("--out", default="sweep_results.jsonl")
+    args = parser.parse_args()
+
+    run_sweep(
+        parse_ints(args.seeds),
+        args.fractions,
+        parse_ints(args.widths),
+        parse_ints(args.heights),
+        args.out,
+        processes=args.processes,
+        max_steps=args.steps,
+        engine=args.engine,
+        rule=args.rule,
+    )
@@ -0,0 +1,159 @@
+"""Every engine of ConwaysGameOfLife must give the same generations as engine="agents".
+
+Run from Actividad_1/ejercicio_2: python -m pytest -q
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+from game_of_life.model import ConwaysGameOfLife
+from game_of_life.recorder import GenerationHistory
+
+## streaming/ esta en la raiz del repositorio, como en stream_server.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from streaming import DELTA, FULL, DeltaEncoder
+
+## (width, height): un solo int de 64 bits, el borde de 64 y un tablero chico
+SIZES = [(7, 5), (20, 13), (65, 6)]
+SEEDS = [0, 1]
+RULES = [90, 30, 110]  ## 90 es lineal (se salta con jump_bits), 30 y 110 no
+STEPS = 12
+
+
+def make(engine, width, height, seed, rule, **kwargs):
+    if engine == "ensemble":
+        seed = [seed]
+    if engine == "tiled":
+        kwargs.setdefault("workers", 2)
+    return ConwaysGameOfLife(width=width, height=height, seed=seed, engine=engine, rule=rule, **kwargs)
+
+
+def states(model):
+    states = model.get_states()
+    return states[0] if states.ndim == 3 else states
+
+
+def plain_steps(width, height, seed, rule, n):
+    """The first n + 1 generations of the agents engine, the reference for everything else."""
+    model = make("agents", width, height, seed, rule, detect_cycles=False)
+    generations = [states(model)]
+    for _ in range(n):
+        model.step()
+        generations.append(states(model))
+    return generations
+
+
+@pytest.mark.parametrize("engine", [engine for engine in ConwaysGameOfLife.ENGINES if engine != "agents"])
+@pytest.mark.parametrize("width, height", SIZES)
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("rule", RULES)
+def test_engine_matches_agents(engine, width, height, seed, rule):
+    expected = plain_steps(width, height, seed, rule, STEPS)
+    model = make(engine, width, height, seed, rule, detect_cycles=False)
+    try:
+        for step, generation in enumerate(expected):
+            if step:
+                model.step()
+            assert np.array_equal(states(model), generation), f"step {step}"
+    finally:
+        model.close()
+
+
+@pytest.mark.parametrize("engine", ["agents", "numpy", "bitpacked", "hashlife"])
+@pytest.mark.parametrize("rule", RULES)
+@pytest.mark.parametrize("n", [0, 1, 7, 40])
+def test_state_at_and_advance_match_steps(engine, rule, n):
+    width, height, seed = 20, 13, 3
+    expected = plain_steps(width, height, seed, rule, n)[n]
+
+    model = make(engine, width, height, seed, rule, detect_cycles=False)
+    model.step()
+    assert np.array_equal(model.state_at(n + 1), plain_steps(width, height, seed, rule, n + 1)[n + 1])
+    with pytest.raises(ValueError):
+        model.state_at(0)
+
+    model = make(engine, width, height, seed, rule, detect_cycles=False)
+    assert np.array_equal(model.state_at(n), expected)
+    model.advance(n)
+    assert model.steps == n
+    assert np.array_equal(states(model), expected)
+
+
+@pytest.mark.parametrize("width, height", [(8, 4), (6, 5), (9, 3)])
+@pytest.mark.parametrize("rule", RULES)
+def test_cycle_detection_agrees(width, height, rule):
+    found = {}
+    for engine in ConwaysGameOfLife.ENGINES:
+        model = make(engine, width, height, 5, rule, cycle_history=10_000)
+        try:
+            while model.running and model.steps < 5000:
+                model.step()
+        finally:
+            model.close()
+        found[engine] = (model.transient, model.period)
+    assert found["agents"][1] is not None
+    assert set(found.values()) == {found["agents"]}, found
+
+
+def test_cell_view_matches_cell():
+    agents = make("agents", 9, 7, 2, 110)
+    arrays = make("numpy", 9, 7, 2, 110)
+    for x, y in [(0, 0), (4, 3), (8, 6)]:
+        cell, view = agents.cell_at(x, y), arrays.cell_at(x, y)
+        assert (view.pos, view.index, view.state) == (cell.pos, cell.index, cell.state)
+        assert [n.pos for n in view.neighbors] == [n.pos for n in cell.neighbors]
+    predicted = np.array([[arrays.cell_at(x, y).next_state for y in range(7)] for x in range(9)])
+    arrays.step()
+    assert np.array_equal(predicted, arrays.get_states())
+
+
+@pytest.mark.parametrize("engine", ["agents", "numpy", "bitpacked", "ensemble"])
+def test_recorder_round_trip(engine, tmp_path):
+    path = str(tmp_path / "run.bin")
+    model = make(engine, 20, 13, 4, 30, detect_cycles=False, record=path)
+    expected = [model.get_states()]
+    for _ in range(STEPS):
+        model.step()
+        expected.append(model.get_states())
+    model.close()
+
+    history = GenerationHistory(path)
+    assert len(history) == len(expected)
+    for generation, board in enumerate(expected):
+        assert np.array_equal(history[generation], board)
+    replayed = list(history.replay(3, 9))
+    assert [generation for generation, _ in replayed] == list(range(3, 9))
+    assert all(np.array_equal(board, expected[generation]) for generation, board in replayed)
+    with pytest.raises(KeyError):
+        history[len(expected)]
+
+
+def decode(frame, board):
+    """Apply one frame to board (None before the first FULL frame) and return the new board."""
+    if frame[0] == FULL:
+        _, _, width, height = struct.unpack_from("<BIII", frame)
+        return np.frombuffer(frame, dtype=np.uint8, offset=13).reshape(height, width).copy()
+    assert frame[0] == DELTA
+    _, _, count = struct.unpack_from("<BII", frame)
+    index = np.frombuffer(frame, dtype="<u4", count=count, offset=9)
+    board.ravel()[index] = np.frombuffer(frame, dtype=np.uint8, offset=9 + 4 * count)
+    return board
+
+
+@pytest.mark.parametrize("engine", ["numpy", "bitpacked"])
+def test_stream_round_trip(engine):
+    ## Con pocas celulas vivas los primeros pasos van como DELTA y despues, cuando cambia mucho, como FULL
+    model = make(engine, 65, 40, 6, 110, detect_cycles=False, initial_fraction_alive=0.05)
+    encoder = DeltaEncoder()
+    board = decode(encoder.full(model.steps, model.board_values()), None)
+    kinds = set()
+    for _ in range(STEPS):
+        model.step()
+        frame = encoder.frame(model.steps, model.board_values())
+        kinds.add(frame[0])
+        board = decode(frame, board)
+        assert np.array_equal(board, model.board_values())
+    assert kinds == {FULL, DELTA}
@@ -0,0 +1,47 @@
+import numpy as np
+
+
+class CellSet:
+    """
+    Conjunto de celdas guardado como un arreglo de bits, un bit por índice de celda
+    (x * height + y, como RandomModel.cell_index).
+    Agregar y consultar son O(1) y ocupa 1 bit por celda del mapa en lugar de una tupla
+    por celda; juntar dos conjuntos (compartir conocimiento) es un OR de todo el arreglo.
+    """
+    __slots__ = ("size", "bits", "_key")
+
+    def __init__(self, size):
+        self.size = size
+        self.bits = bytearray((size + 7) // 8)
+        self._key = None
+
+    def add(self, index):
+        """Agrega la celda index"""
+        mask = 1 << (index & 7)
+        if not self.bits[index >> 3] & mask:
+            self.bits[index >> 3] |= mask
+            self._key = None
+
+    def __contains__(self, index):
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def __len__(self):
+        return int.from_bytes(self.bits, "little").bit_count()
+
+    def __ior__(self, other):
+        """Agrega todas las celdas de other con un solo OR sobre los bytes"""
+        mine = np.frombuffer(self.bits, dtype=np.uint8)
+        np.bitwise_or(mine, np.frombuffer(other.bits, dtype=np.uint8), out=mine)
+        self._key = None
+        return self
+
+    def indices(self):
+        """Arreglo con los índices de las celdas del conjunto, en orden"""
+        flags = np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8), bitorder="little")
+        return np.flatnonzero(flags[:self.size])
+
+    def key(self):
+        """Copia inmutable de los bits, sirve como llave de diccionario (conjuntos iguales, llaves iguales)"""
+        if self._key is None:
+            self._key = bytes(self.bits)
+        return self._key
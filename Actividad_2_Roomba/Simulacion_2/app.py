@@ -56,6 +56,11 @@ model_params = {
     "num_obstacles": Slider("Number of obstacles", 10, 1, 200),
     "width": Slider("Grid width", 28, 1, 50),
     "height": Slider("Grid height", 28, 1, 50),
+    "profile": {
+        "type": "Checkbox",
+        "value": False,
+        "label": "Time each phase",
+    },
 }
 
 # Create the model using the initial parameters from the settings
@@ -84,9 +89,25 @@ plot_component = make_plot_component(
     post_process=post_process_lines,
 )
 
+def post_process_timing(ax):
+    ax.legend(loc="upper right")
+    ax.set_ylabel("Milisegundos por paso")
+    ax.set_xlabel("Paso")
+
+# Tiempo de cada fase del paso, para ver donde se va el tiempo con grids grandes
+timing_plot = make_plot_component(
+    {"Perception ms": "tab:orange", "Neighbor scan ms": "tab:purple", "Move decision ms": "tab:brown", "DataCollector ms": "tab:gray"},
+    post_process=post_process_timing,
+)
+
+def timing_component(model):
+    # Solo hay tiempos si el modelo corre con profile
+    if model.profile:
+        return timing_plot(model)
+
 page = SolaraViz(
     model,
-    components=[space_component, plot_component],
+    components=[space_component, plot_component, timing_component],
     model_params=model_params,
     name="Random Model",
 )
@@ -0,0 +1,94 @@
+"""Check that FleetModel behaves like RandomModel.
+
+FleetModel (random_agents/fleet.py) moves every roomba at once with numpy
+arrays, so it can not match RandomModel step by step. Instead both models run
+the same scenarios over many seeds and the summaries are compared: steps until
+the floor is clean, dirty cells % at a few checkpoints, average battery and
+dead roombas. A metric fails when the means differ by more than --sigmas
+standard errors and by more than --tolerance of the RandomModel mean.
+
+Example:
+    python fleet_check.py --seeds 50
+    python fleet_check.py --width 100 --height 100 --agents 30 --dirty 1000 --obstacles 500
+"""
+import argparse
+import contextlib
+import io
+import math
+import statistics
+import sys
+
+from random_agents.fleet import FleetModel
+from random_agents.model import RandomModel
+
+CHECKPOINTS = (25, 50, 100, 200)
+
+
+def run_one(model_class, params, max_steps):
+    """Run one model until it is clean or max_steps and return its summary metrics."""
+    # RandomModel imprime en cada evento, no se quiere en la salida
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = model_class(**params)
+        while model.running and model.steps < max_steps:
+            model.step()
+        model.datacollector.collect(model)
+    data = model.datacollector.get_model_vars_dataframe()
+    dirty = data["Dirty Cells %"].tolist()
+    summary = {
+        "steps": model.steps,
+        "avg_battery": statistics.fmean(data["Avg Battery %"]),
+        "dead": params["num_agents"] - data["Active Agents"].iloc[-1],
+    }
+    for step in CHECKPOINTS:
+        # Si ya termino, la suciedad se quedo en su ultimo valor
+        summary[f"dirty_at_{step}"] = dirty[min(step, len(dirty) - 1)]
+    return summary
+
+
+def compare(reference, candidate, sigmas, tolerance):
+    """Return (metric, reference mean, candidate mean, passed) for every metric."""
+    rows = []
+    for metric in reference[0]:
+        a = [run[metric] for run in reference]
+        b = [run[metric] for run in candidate]
+        mean_a, mean_b = statistics.fmean(a), statistics.fmean(b)
+        error = math.sqrt(statistics.variance(a) / len(a) + statistics.variance(b) / len(b)) if len(a) > 1 else 0
+        difference = abs(mean_a - mean_b)
+        passed = difference <= sigmas * error or difference <= tolerance * max(abs(mean_a), 1)
+        rows.append((metric, mean_a, mean_b, passed))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=50)
+    parser.add_argument("--height", type=int, default=50)
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--dirty", type=int, default=200, help="number of dirty cells")
+    parser.add_argument("--obstacles", type=int, default=100)
+    parser.add_argument("--seeds", type=int, default=30, help="runs per model")
+    parser.add_argument("--steps", type=int, default=3000, help="stop a run after this many steps")
+    parser.add_argument("--sigmas", type=float, default=3.0)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    runs = {}
+    for model_class in (RandomModel, FleetModel):
+        runs[model_class] = [
+            run_one(model_class, {
+                "num_agents": args.agents,
+                "width": args.width,
+                "height": args.height,
+                "seed": seed,
+                "dirty_cells": args.dirty,
+                "num_obstacles": args.obstacles,
+            }, args.steps)
+            for seed in range(args.seeds)
+        ]
+
+    rows = compare(runs[RandomModel], runs[FleetModel], args.sigmas, args.tolerance)
+    print(f"{'metric':<16}{'RandomModel':>14}{'FleetModel':>14}")
+    for metric, mean_a, mean_b, passed in rows:
+        print(f"{metric:<16}{mean_a:14.2f}{mean_b:14.2f}  {'ok' if passed else 'DIFFERENT'}")
+    if not all(passed for *_, passed in rows):
+        sys.exit(1)
@@ -1,9 +1,8 @@
 from mesa.discrete_space import CellAgent, FixedAgent
 import math
-import random
+import time
 
-dirty_agents = []
-charging_station = []
+from .memory import CellSet
 
 
 class RandomAgent(CellAgent):
@@ -24,10 +23,11 @@ class RandomAgent(CellAgent):
         self.battery = 100
         self.charging = False
         self.my_charging_station = cell  # Guardamos la posición inicial como nuestra estación
-        self.known_charging_stations = [cell]  # Lista de estaciones descubiertas
+        # Las estaciones conocidas son bits por índice de celda (ver CellSet), 1 bit por celda del mapa.
+        # Lo explorado no se guarda por agente: va en el mapa de cobertura del modelo (cell.seen)
+        self.known_charging_stations = CellSet(model.width * model.height)  # Estaciones descubiertas
+        self.known_charging_stations.add(model.cell_index(cell))
         self.is_dead = False  # Estado para saber si el agente murió
-        self.visited_cells = set()  # Memoria de celdas visitadas
-        self.visited_cells.add(cell.coordinate)  # Agregamos la celda inicial
 
     def remove_agent(self, agent: CellAgent) -> None:
             """Usamos esto para quitar los agentes de las celdas si usamos la función se quita la cell de la lista dirty_cells
@@ -36,113 +36,103 @@ class RandomAgent(CellAgent):
             self.empty = self.is_empty
 
     def explore_smart(self, neighborhood):
-        """Explora el ambiente priorizando celdas no visitadas"""
+        """Explora el ambiente yendo hacia la frontera más cercana del mapa de cobertura compartido.
+
+        La frontera son las celdas que ningún agente ha visto todavía o que siguen sucias,
+        así los agentes no repiten zonas que otro ya recorrió.
+        """
         cells_list = list(neighborhood)
 
         if len(cells_list) == 0:
             return None
 
-        # Filtrar celdas no visitadas
-        unvisited = [cell for cell in cells_list if cell.coordinate not in self.visited_cells]
+        field = self.model.frontier_field()
+        distances = [field[self.model.cell_index(cell)] for cell in cells_list]
+        reachable = [distance for distance in distances if distance != self.model.UNREACHABLE]
 
-        if unvisited:
-            # Priorizar celdas no visitadas
-            chosen = random.choice(unvisited)
+        if reachable:
+            # Entre las celdas que más nos acercan a la frontera, una al azar
+            closest = min(reachable)
+            chosen = self.random.choice([cell for cell, distance in zip(cells_list, distances) if distance == closest])
         else:
-            # Si todas están visitadas, elegir aleatoriamente
-            chosen = random.choice(cells_list)
+            # Si no queda frontera a nuestro alcance, elegir aleatoriamente
+            chosen = self.random.choice(cells_list)
 
-        # Marcar la celda como visitada
-        self.visited_cells.add(chosen.coordinate)
         return chosen
 
     def discover_charging_stations(self):
         """Detecta estaciones de carga en el vecindario y las añade a la memoria"""
-        neighbors = list(self.cell.neighborhood)
+        neighbors = self.model.walkable_neighbors(self.cell)
 
         for n in neighbors:
-            agents_in_cell = [type(agent).__name__ for agent in n.agents]
-            if "ChargingStation" in agents_in_cell:
+            if n.station:
                 # Si encontramos una estación y no la conocemos, la añadimos
-                if n not in self.known_charging_stations:
-                    self.known_charging_stations.append(n)
+                index = self.model.cell_index(n)
+                if index not in self.known_charging_stations:
+                    self.known_charging_stations.add(index)
                     print(f"¡Agente descubrió nueva estación en {n.coordinate}!")
 
-
     def calculateChargingStationPath(self, neighborhood):
-        """Calcula la ruta más rápida hacia la estación de carga más cercana que conozca"""
+        """Calcula el siguiente paso de la ruta más corta hacia la estación conocida más cercana.
+
+        Usa el campo de distancias del modelo para las estaciones que conocemos (BFS que
+        rodea obstáculos), así que solo hay que comparar las celdas del vecindario.
+        """
         cells_list = list(neighborhood)
 
         if len(cells_list) == 0:
             return None
 
-        # Encontrar la estación conocida más cercana a nuestra posición actual
-        closest_station = self.known_charging_stations[0]
-        min_distance_to_station = math.sqrt(
-            (self.cell.coordinate[0] - closest_station.coordinate[0])**2 +
-            (self.cell.coordinate[1] - closest_station.coordinate[1])**2
-        )
-
-        for station in self.known_charging_stations:
-            distance = math.sqrt(
-                (self.cell.coordinate[0] - station.coordinate[0])**2 +
-                (self.cell.coordinate[1] - station.coordinate[1])**2
-            )
-            if distance < min_distance_to_station:
-                min_distance_to_station = distance
-                closest_station = station
-
-        # Ahora encontramos la celda en nuestro vecindario que nos acerque más a esa estación
-        distancia_mas_corta = math.sqrt(
-            (cells_list[0].coordinate[0] - closest_station.coordinate[0])**2 +
-            (cells_list[0].coordinate[1] - closest_station.coordinate[1])**2
-        )
-        coordinate_to_move = cells_list[0]
-
-        for cell_n in cells_list:
-            distancia_medida = math.sqrt(
-                (cell_n.coordinate[0] - closest_station.coordinate[0])**2 +
-                (cell_n.coordinate[1] - closest_station.coordinate[1])**2
-            )
-            if distancia_medida < distancia_mas_corta:
-                distancia_mas_corta = distancia_medida
-                coordinate_to_move = cell_n
-
-        return coordinate_to_move
+        field = self.model.distance_field(self.known_charging_stations)
+
+        # Las celdas sin camino a ninguna estación (UNREACHABLE) quedan al final
+        def steps_to_station(cell):
+            distance = field[self.model.cell_index(cell)]
+            return distance if distance != self.model.UNREACHABLE else math.inf
+
+        return min(cells_list, key=steps_to_station)
     
     def move(self):
         """
         Determines the next empty cell in its neighborhood, and moves to it
         """
-        neighbors = list(cell for cell in self.cell.neighborhood)
+        # Con profile se mide la percepcion y la revision de vecinos, para los reportes del modelo
+        profile = self.model.profile
+        if profile:
+            start = time.perf_counter()
+        # Vecinos transitables del grafo de navegación del modelo, los obstáculos ya no aparecen
+        neighbors = self.model.walkable_neighbors(self.cell)
         dirty_cell = None
         dirty_agent_to_remove = None
 
         # Descubrir estaciones de carga en el vecindario
+        if profile:
+            perceiving = time.perf_counter()
         self.discover_charging_stations()
+        self.model.mark_seen(self.cell)
+        if profile:
+            perceived = time.perf_counter()
 
         # Permitir moverse a celdas vacías O a cualquier estación de carga conocida
         def can_move_to(cell):
             if cell.is_empty:
                 return True
             # Permitir moverse a cualquier estación de carga conocida
-            for station in self.known_charging_stations:
-                if cell.coordinate == station.coordinate:
-                    return True
-            return False
+            return cell.station and self.model.cell_index(cell) in self.known_charging_stations
 
-        next_moves = self.cell.neighborhood.select(can_move_to)  
+        next_moves = [cell for cell in neighbors if can_move_to(cell)]
         
         # Buscar dirty cells en los neighbors
         for n in neighbors:
-            agents_in_cell = [type(agent).__name__ for agent in n.agents]
-            if "DirtyAgent" in agents_in_cell:
+            if n.dirty:
                 dirty_cell = n
-                for agent in n.agents:
-                    if type(agent).__name__ == "DirtyAgent":
-                        dirty_agent_to_remove = agent
-                        break
+                dirty_agent_to_remove = self.model.dirty_agents[n.coordinate]
                 break
+
+        if profile:
+            scanned = time.perf_counter()
+            self.model.phase_times["perception"] += perceived - perceiving
+            self.model.phase_times["neighbor_scan"] += (scanned - start) - (perceived - perceiving)
         
 
         
@@ -172,11 +162,7 @@ class RandomAgent(CellAgent):
             print(f"Posición actual: {self.cell.coordinate}, Próximo paso: {charging_cell.coordinate}")
 
             # Verificar si llegamos a cualquier estación conocida
-            is_at_station = False
-            for station in self.known_charging_stations:
-                if charging_cell.coordinate == station.coordinate:
-                    is_at_station = True
-                    break
+            is_at_station = charging_cell.station and self.model.cell_index(charging_cell) in self.known_charging_stations
 
             if is_at_station:
                 print(f"¡Llegó a una estación de carga con {self.battery}% batería!")
@@ -193,13 +179,11 @@ class RandomAgent(CellAgent):
             if dirty_cell is not None:
                 # Si encontramos una celda sucia en el vecindario, la limpiamos
                 self.move_to(dirty_cell)
-                dirty_agent_to_remove.remove()
-                if dirty_cell in dirty_agents:
-                    dirty_agents.remove(dirty_cell)
+                dirty_agent_to_remove.remove()  # Tambien limpia la bandera y el registro del modelo
                 self.battery -= 1
             else:
                 # Exploración aleatoria del ambiente
-                if len(dirty_agents) == 0:
+                if len(self.model.dirty_agents) == 0:
                     self.model.running = False
                 else:
                     next_cell = self.explore_smart(next_moves)
@@ -212,7 +196,12 @@ class RandomAgent(CellAgent):
         """
         Determines the new direction it will take, and then moves
         """
+        if not self.model.profile:
+            self.move()
+            return
+        start = time.perf_counter()
         self.move()
+        self.model.phase_times["move"] += time.perf_counter() - start
 
 class DirtyAgent(CellAgent):
     """
@@ -221,7 +210,15 @@ class DirtyAgent(CellAgent):
     def __init__(self, model, cell):
         super().__init__(model)
         self.cell=cell
-        dirty_agents.append(self.cell) ## Agregamos cada dirty cell a la lista global
+        model.dirty_agents[cell.coordinate] = self ## Registramos la dirty cell en el modelo
+        cell.dirty = True
+
+    def remove(self):
+        """Quita la suciedad del modelo: apaga cell.dirty y la saca de model.dirty_agents"""
+        self.cell.dirty = False
+        self.model.dirty_agents.pop(self.cell.coordinate, None)
+        self.model.coverage_changed()  # La celda limpia ya no es parte de la frontera
+        super().remove()
 
     def step(self):
         pass
@@ -234,8 +231,9 @@ class ChargingStation(CellAgent):
     def __init__(self, model, cell):
         super().__init__(model)
         self.cell=cell
-        charging_station.append(self.cell)
-        print(charging_station)
+        model.charging_stations[cell.coordinate] = cell
+        cell.station = True
+        print(list(model.charging_stations.values()))
         
 
     def step(self):
@@ -250,6 +248,8 @@ class ObstacleAgent(FixedAgent):
     def __init__(self, model, cell):
         super().__init__(model)
         self.cell=cell
+        cell.obstacle = True
+        model.obstacles_changed()  # El grafo y los caminos guardados ya no son validos
 
     def step(self):
         pass
\ No newline at end of file
@@ -0,0 +1,328 @@
+import numpy as np
+from mesa import Model
+from mesa.datacollection import DataCollector
+
+from .model import EMPTY, OBSTACLE, DIRTY, STATION, ROOMBA, DEAD_ROOMBA
+
+# Vecindad de Moore en el mismo orden que la grid de mesa, así los empates se rompen igual
+MOORE = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+# Puntaje de un movimiento que no se puede hacer
+BLOCKED = np.iinfo(np.int32).max
+
+
+def bfs(walkable, offsets, sources, max_distance=None, targets=None):
+    """BFS por niveles sobre un arreglo plano de celdas.
+
+    Los vecinos de la celda i son i + offsets y walkable dice cuáles se pueden pisar; el
+    arreglo debe tener un borde no transitable para que ningún vecino se salga. Regresa la
+    distancia de cada celda a la fuente más cercana, o -1 si no hay camino (o si está a más
+    de max_distance). Con targets se detiene en cuanto todas esas celdas tienen distancia.
+    """
+    field = np.full(len(walkable), -1, dtype=np.int32)
+    stamp = np.empty(len(walkable), dtype=np.int64)
+    frontier = np.asarray(sources, dtype=np.int64)
+    field[frontier] = 0
+    distance = 0
+    while len(frontier) and (max_distance is None or distance < max_distance):
+        if targets is not None and (field[targets] >= 0).all():
+            break
+        distance += 1
+        candidates = (frontier[:, None] + offsets).ravel()
+        candidates = candidates[walkable[candidates]]
+        candidates = candidates[field[candidates] < 0]
+        # Quitar repetidos sin ordenar: cada celda se queda con la última posición que la escribió
+        order = np.arange(len(candidates))
+        stamp[candidates] = order
+        frontier = candidates[stamp[candidates] == order]
+        field[frontier] = distance
+    return field
+
+
+class FleetModel(Model):
+    """
+    Versión sin agentes de RandomModel para flotas grandes (miles de roombas en mapas de millones de celdas).
+    Las roombas son arreglos de numpy (posición, batería, cargando, muerta) y en cada paso se aplica
+    a todas a la vez la misma política: ir a cargar abajo de 40% de batería, limpiar la suciedad vecina
+    y si no hay, explorar hacia la frontera del mapa de cobertura.
+    Diferencias con RandomModel, que mueve a los agentes uno por uno en orden aleatorio:
+        - Todas deciden con el estado del inicio del paso; una celda que se vacía en el paso se
+          puede ocupar hasta el siguiente.
+        - Si varias quieren la misma celda (que no sea estación) gana la que va primero en una
+          permutación del paso sacada de self.rng; las demás se quedan quietas sin gastar batería.
+        - Las distancias a las estaciones se calculan rodeando obstáculos solo hasta CHARGE_RANGE
+          pasos, más lejos no les alcanza la batería y se guían por la distancia en línea recta.
+        - Estaciones, obstáculos y suciedad se colocan sin repetir celdas.
+    Args:
+        num_agents: Number of agents in the simulation
+        height, width: The size of the grid to model
+        seed, dirty_cells, num_obstacles: como en RandomModel
+    """
+    CHARGE_THRESHOLD = 40
+    CHARGE_RANGE = 40
+    # Estaciones por bloque al calcular sus campos de distancia locales, limita la memoria temporal
+    PATCH_CHUNK = 512
+
+    def __init__(self, num_agents=10, width=8, height=8, seed=42, dirty_cells=10, num_obstacles=10):
+
+        super().__init__(seed=seed)
+        self.num_agents = num_agents
+        self.num_obstacles = num_obstacles
+        self.seed = seed
+        self.dirty_cells = dirty_cells
+        self.width = width
+        self.height = height
+
+        if num_agents + num_obstacles + dirty_cells > width * height:
+            raise ValueError(f"{num_agents + num_obstacles + dirty_cells} objects do not fit in a {width}x{height} grid")
+
+        # Las celdas son índices planos de la grid con un borde de obstáculos: (x + 1) * (height + 2) + y + 1.
+        # Los vecinos de i son i + self.offsets y nunca se salen del arreglo
+        self.stride = height + 2
+        size = (width + 2) * self.stride
+        self.offsets = np.array([dx * self.stride + dy for dx, dy in MOORE], dtype=np.int64)
+        self.walkable = np.zeros(size, dtype=bool)
+        self.walkable.reshape(width + 2, self.stride)[1:-1, 1:-1] = True
+        self.dirty = np.zeros(size, dtype=bool)
+        self.seen = np.zeros(size, dtype=bool)  # Mapa de cobertura compartido
+        self.occupancy = np.zeros(size, dtype=np.int32)  # Roombas en cada celda, vivas o muertas
+        self.station_id = np.full(size, -1, dtype=np.int32)
+
+        # Una estación por roomba, luego obstáculos y suciedad, en celdas distintas
+        chosen = self.rng.permutation(width * height)[:num_agents + num_obstacles + dirty_cells]
+        cells = (chosen // height + 1) * self.stride + chosen % height + 1
+        self.station_cells = cells[:num_agents]
+        self.station_id[self.station_cells] = np.arange(num_agents, dtype=np.int32)
+        self.walkable[cells[num_agents:num_agents + num_obstacles]] = False
+        self.dirty[cells[num_agents + num_obstacles:]] = True
+        self.dirty_count = dirty_cells
+
+        # Estado de las roombas, cada una empieza en su estación con la batería llena
+        self.position = self.station_cells.copy()
+        self.battery = np.full(num_agents, 100, dtype=np.int32)
+        self.charging = np.zeros(num_agents, dtype=bool)
+        self.dead = np.zeros(num_agents, dtype=bool)
+        self.occupancy[self.position] = 1
+
+        # Estaciones conocidas: un bit por roomba y estación (como CellSet), cada una conoce la suya.
+        # Las mismas parejas se guardan como listas para recorrer solo lo que conoce cada roomba
+        agents = np.arange(num_agents)
+        self.known = np.zeros((num_agents, (num_agents + 7) // 8), dtype=np.uint8)
+        self.known[agents, agents >> 3] = 1 << (agents & 7)
+        self.known_agent = agents.copy()
+        self.known_station = agents.copy()
+
+        # Campo de distancias de cada estación en una ventana de radio CHARGE_RANGE + 1, se calcula al primer uso
+        window = 2 * self.CHARGE_RANGE + 3
+        self.patches = np.zeros((num_agents, window * window), dtype=np.uint8)
+        self.patch_ready = np.zeros(num_agents, dtype=bool)
+
+        # Guardamos el número inicial de celdas sucias para calcular porcentaje
+        self.initial_dirty_cells = self.dirty_cells
+
+        # DataCollector con los mismos reportes de estado que RandomModel
+        self.datacollector = DataCollector(
+            model_reporters={
+                "Dirty Cells %": lambda m: (m.dirty_count / m.initial_dirty_cells * 100) if m.initial_dirty_cells > 0 else 0,
+                "Avg Battery %": lambda m: float(m.battery[~m.dead].mean()) if not m.dead.all() else 0,
+                "Active Agents": lambda m: int((~m.dead).sum()),
+            }
+        )
+
+        self.running = True
+
+    def coordinates(self, cells):
+        """Coordenadas (x, y) de la grid de los índices planos cells, como arreglo (n, 2)"""
+        cells = np.asarray(cells)
+        return np.stack([cells // self.stride - 1, cells % self.stride - 1], axis=-1)
+
+    def board_values(self):
+        """Arreglo (height, width) con el valor de cada celda, con los valores de model.py"""
+        values = np.full(len(self.walkable), EMPTY, dtype=np.uint8)
+        values[~self.walkable] = OBSTACLE
+        values[self.dirty] = DIRTY
+        values[self.station_cells] = STATION
+        values[self.position[~self.dead]] = ROOMBA
+        values[self.position[self.dead]] = DEAD_ROOMBA
+        return values.reshape(self.width + 2, self.stride)[1:-1, 1:-1].T.copy()
+
+    def knows(self, agents, stations):
+        """Si cada roomba de agents conoce la estación correspondiente de stations"""
+        return (self.known[agents, stations >> 3] >> (stations & 7)) & 1 == 1
+
+    def _discover(self, neighbors):
+        """Agrega a la memoria de cada roomba las estaciones de su vecindario que no conocía"""
+        stations = self.station_id[neighbors]
+        agents, direction = np.nonzero(stations >= 0)
+        stations = stations[agents, direction]
+        new = ~self.knows(agents, stations)
+        if not new.any():
+            return
+        # Una roomba puede ver la misma estación nueva una sola vez por paso, pero se quitan repetidos por si acaso
+        pairs = np.unique(agents[new].astype(np.int64) * self.num_agents + stations[new])
+        agents, stations = pairs // self.num_agents, pairs % self.num_agents
+        np.bitwise_or.at(self.known, (agents, stations >> 3), (1 << (stations & 7)).astype(np.uint8))
+        self.known_agent = np.concatenate([self.known_agent, agents])
+        self.known_station = np.concatenate([self.known_station, stations])
+
+    def _station_patches(self, stations):
+        """Calcula los campos de distancia locales que falten de stations.
+
+        Cada uno es un BFS que sale de la estación sin pasar de CHARGE_RANGE pasos, dentro de
+        una ventana con borde; como los obstáculos no se mueven no se vuelve a calcular.
+        """
+        missing = np.unique(stations[~self.patch_ready[stations]])
+        radius = self.CHARGE_RANGE + 1
+        window = 2 * radius + 1
+        span = np.arange(-radius, radius + 1)
+        offsets = np.array([dx * window + dy for dx, dy in MOORE], dtype=np.int64)
+        grid = self.walkable.reshape(self.width + 2, self.stride)
+        for start in range(0, len(missing), self.PATCH_CHUNK):
+            chunk = missing[start:start + self.PATCH_CHUNK]
+            sx, sy = (self.station_cells[chunk] // self.stride)[:, None, None], (self.station_cells[chunk] % self.stride)[:, None, None]
+            gx, gy = sx + span[None, :, None], sy + span[None, None, :]
+            inside = (gx >= 0) & (gx < self.width + 2) & (gy >= 0) & (gy < self.stride)
+            walk = np.zeros((len(chunk), window, window), dtype=bool)
+            walk[inside] = grid[np.broadcast_to(gx, inside.shape)[inside], np.broadcast_to(gy, inside.shape)[inside]]
+            walk[:, [0, -1], :] = False
+            walk[:, :, [0, -1]] = False
+            sources = np.arange(len(chunk)) * window * window + radius * window + radius
+            field = bfs(walk.ravel(), offsets, sources, max_distance=self.CHARGE_RANGE)
+            self.patches[chunk] = np.where(field < 0, 255, field).reshape(len(chunk), window * window)
+            self.patch_ready[chunk] = True
+
+    def _station_scores(self, agents, neighbors):
+        """Pasos desde cada vecino de agents hasta su estación conocida más cercana, forma (len(agents), 8).
+
+        Hasta CHARGE_RANGE es la distancia rodeando obstáculos; más lejos (o sin camino dentro de la
+        ventana) CHARGE_RANGE + 1 más la distancia en línea recta, que siempre queda detrás.
+        """
+        row = np.full(self.num_agents, -1, dtype=np.int64)
+        row[agents] = np.arange(len(agents))
+        pairs = row[self.known_agent] >= 0
+        pair_rows, stations = row[self.known_agent[pairs]], self.known_station[pairs]
+        self._station_patches(stations)
+
+        radius = self.CHARGE_RANGE + 1
+        window = 2 * radius + 1
+        cells = neighbors[pair_rows]
+        dx = cells // self.stride - (self.station_cells[stations] // self.stride)[:, None]
+        dy = cells % self.stride - (self.station_cells[stations] % self.stride)[:, None]
+        inside = (np.abs(dx) <= radius) & (np.abs(dy) <= radius)
+        local = np.where(inside, (dx + radius) * window + dy + radius, 0)
+        steps = self.patches[stations[:, None], local].astype(np.int32)
+        straight = radius + np.maximum(np.abs(dx), np.abs(dy)).astype(np.int32)
+        scores = np.where(inside & (steps < 255), steps, straight)
+
+        best = np.full((len(agents), len(MOORE)), BLOCKED, dtype=np.int32)
+        np.minimum.at(best, pair_rows, scores)
+        return best
+
+    def step(self):
+        '''Advance the model by one step.'''
+        self.datacollector.collect(self)
+
+        # Percepción: todas las roombas (hasta las muertas) descubren estaciones y marcan lo que ven
+        neighbors = self.position[:, None] + self.offsets
+        walkable = self.walkable[neighbors]
+        self._discover(neighbors)
+        self.seen[self.position] = True
+        self.seen[neighbors[walkable]] = True
+
+        # Se puede ir a celdas vacías o a estaciones conocidas, que admiten varias roombas
+        stations = self.station_id[neighbors]
+        empty = walkable & (self.occupancy[neighbors] == 0) & ~self.dirty[neighbors] & (stations < 0)
+        agents, direction = np.nonzero(stations >= 0)
+        known_station = np.zeros_like(empty)
+        known_station[agents, direction] = self.knows(agents, stations[agents, direction])
+        can_move = empty | known_station
+        dirty = self.dirty[neighbors]
+
+        # Misma cadena de decisiones que RandomAgent.move
+        alive = ~self.dead
+        dies = alive & (self.battery <= 0)
+        self.dead |= dies
+        active = alive & ~dies
+        charge = active & self.charging & (self.battery < 100)
+        returning = active & ~self.charging & (self.battery < self.CHARGE_THRESHOLD)
+        free = active & ~self.charging & ~returning
+        cleaning = free & dirty.any(axis=1)
+        exploring = free & ~cleaning
+
+        self.battery[charge] = np.minimum(self.battery[charge] + 5, 100)
+        self.charging[charge & (self.battery >= 100)] = False
+
+        if exploring.any() and self.dirty_count == 0:
+            self.running = False
+            exploring[:] = False
+
+        target = np.full(self.num_agents, -1, dtype=np.int64)
+
+        # Ir a cargar: el vecino más cerca de una estación conocida, el primero si hay empate
+        agents = np.flatnonzero(returning & can_move.any(axis=1))
+        if len(agents):
+            scores = np.where(can_move[agents], self._station_scores(agents, neighbors[agents]), BLOCKED)
+            target[agents] = neighbors[agents, scores.argmin(axis=1)]
+
+        # Limpiar la primera celda sucia del vecindario
+        agents = np.flatnonzero(cleaning)
+        target[agents] = neighbors[agents, dirty[agents].argmax(axis=1)]
+
+        # Explorar: el vecino más cerca de la frontera con desempate al azar, o cualquiera si no hay frontera
+        agents = np.flatnonzero(exploring & can_move.any(axis=1))
+        if len(agents):
+            frontier = self.frontier_field(neighbors[agents][can_move[agents]])
+            distance = frontier[neighbors[agents]].astype(np.float64)
+            distance[distance < 0] = BLOCKED
+            scores = np.where(can_move[agents], distance + self.rng.random(distance.shape) * 0.5, np.inf)
+            target[agents] = neighbors[agents, scores.argmin(axis=1)]
+
+        self._apply_moves(target, returning, cleaning)
+
+    def frontier_field(self, targets=None):
+        """Campo de distancias a la celda más cercana que falta explorar o que sigue sucia.
+
+        Con targets el BFS para en cuanto esas celdas tienen distancia, el resto queda en -1.
+        """
+        pending = self.walkable & (~self.seen | self.dirty)
+        # Al principio casi todo el mapa está pendiente: el BFS sale solo de las celdas pendientes
+        # en la orilla (con algún vecino ya explorado) y no entra a las demás, que valen 0 de todos modos
+        grid = (self.walkable & ~pending).reshape(self.width + 2, self.stride)
+        explored_next = np.zeros_like(grid)
+        for dx, dy in MOORE:
+            explored_next[1:-1, 1:-1] |= grid[1 + dx:self.width + 1 + dx, 1 + dy:self.height + 1 + dy]
+        edge = pending & explored_next.ravel()
+        if targets is not None:
+            targets = targets[~pending[targets]]
+        field = bfs(self.walkable & ~(pending & ~edge), self.offsets, np.flatnonzero(edge), targets=targets)
+        field[pending] = 0
+        return field
+
+    def _apply_moves(self, target, returning, cleaning):
+        """Mueve a las roombas con target y resuelve los choques.
+
+        En cada celda que no es estación entra solo la roomba que va primero en una permutación
+        del paso, así el resultado depende solo de la semilla.
+        """
+        movers = np.flatnonzero(target >= 0)
+        priority = self.rng.permutation(self.num_agents)
+        movers = movers[np.argsort(priority[movers], kind="stable")]
+        cells = target[movers]
+        shared = self.station_id[cells] >= 0
+        _, first = np.unique(cells[~shared], return_index=True)
+        winners = np.concatenate([movers[shared], movers[~shared][first]])
+        cells = target[winners]
+
+        np.subtract.at(self.occupancy, self.position[winners], 1)
+        np.add.at(self.occupancy, cells, 1)
+        self.position[winners] = cells
+
+        arrived = returning[winners] & (self.station_id[cells] >= 0)
+        charged = winners[arrived]
+        self.charging[charged] = True
+        self.battery[charged] = np.minimum(self.battery[charged] + 5, 100)
+        self.battery[winners[~arrived]] -= 1
+
+        cleaned = cells[cleaning[winners]]
+        self.dirty[cleaned] = False
+        self.dirty_count -= len(cleaned)
@@ -1,8 +1,23 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
 from mesa import Model
 from mesa.discrete_space import OrthogonalMooreGrid
 from mesa.datacollection import DataCollector
 
-from .agent import RandomAgent, ObstacleAgent, DirtyAgent, ChargingStation, dirty_agents, charging_station
+from .agent import RandomAgent, ObstacleAgent, DirtyAgent, ChargingStation
+
+# Vecindad de Moore en el mismo orden que cell.neighborhood de la grid
+MOORE = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+# Valor de cada celda en board_values segun lo que tenga encima (los colores del visor de stream_server.py)
+EMPTY = 0
+OBSTACLE = 1
+DIRTY = 2
+STATION = 3
+ROOMBA = 4
+DEAD_ROOMBA = 5
 
 class RandomModel(Model):
     """
@@ -10,8 +25,13 @@ class RandomModel(Model):
     Args:
         num_agents: Number of agents in the simulation
         height, width: The size of the grid to model
+        profile: Mide el tiempo de cada fase del paso y lo reporta en el DataCollector
     """
-    def __init__(self, num_agents=10, width=8, height=8, seed=42, dirty_cells=10, num_obstacles=10):
+    # Los campos de distancia guardan uint16; UNREACHABLE marca las celdas sin camino
+    UNREACHABLE = np.iinfo(np.uint16).max
+    # Bytes que pueden ocupar los campos guardados en distance_fields (campos y llaves)
+    MAX_DISTANCE_FIELD_BYTES = 128 * 1024 * 1024
+    def __init__(self, num_agents=10, width=8, height=8, seed=42, dirty_cells=10, num_obstacles=10, profile=False):
 
         super().__init__(seed=seed)
         self.num_agents = num_agents
@@ -23,9 +43,25 @@ class RandomModel(Model):
 
         self.grid = OrthogonalMooreGrid([width, height], torus=False)
 
-        # Limpiamos las listas globales al iniciar el modelo
-        dirty_agents.clear()
-        charging_station.clear()
+        # Banderas por celda (property layers de mesa): cell.dirty, cell.station y cell.obstacle
+        # son una sola consulta al arreglo, los agentes las actualizan al ponerse o quitarse.
+        # cell.seen es el mapa de cobertura que comparten todos los agentes
+        for layer in ("dirty", "station", "obstacle", "seen"):
+            self.grid.create_property_layer(layer, default_value=False, dtype=bool)
+
+        # Registros propios del modelo, por coordenada: insertar, quitar y contar son O(1)
+        # y varios modelos pueden correr a la vez sin pisarse
+        self.dirty_agents = {}  # coordenada -> DirtyAgent que sigue sucio
+        self.charging_stations = {}  # coordenada -> celda con estacion de carga
+        # Campos de distancia ya calculados, por conjunto de estaciones conocidas (ver distance_field)
+        self.distance_fields = OrderedDict()
+        self._distance_bytes = 0
+        # Grafo de celdas transitables, se compila al primer uso despues de colocar los obstaculos
+        self._navigation = None
+        # Campo de distancias a la frontera de exploracion (ver frontier_field)
+        self._frontier = None
+        self._frontier_step = None
+        self._frontier_stale = True
 
         # Seleccionamos posiciones aleatorias para cada agente
         estaciones_carga = self.random.choices(self.grid.empties.cells, k=self.num_agents)
@@ -56,17 +92,165 @@ class RandomModel(Model):
         # Guardamos el número inicial de celdas sucias para calcular porcentaje
         self.initial_dirty_cells = self.dirty_cells
 
+        # Segundos que tarda cada fase en el paso actual, con profile los agentes van sumando sus tiempos
+        self.profile = profile
+        self.phase_times = dict.fromkeys(("perception", "neighbor_scan", "move", "datacollector"), 0.0)
+
         # DataCollector para estadísticas
-        self.datacollector = DataCollector(
-            model_reporters={
-                "Dirty Cells %": lambda m: (len(dirty_agents) / m.initial_dirty_cells * 100) if m.initial_dirty_cells > 0 else 0,
-                "Avg Battery %": lambda m: self._get_avg_battery(m),
-                "Active Agents": lambda m: self._get_active_agents(m),
-            }
-        )
+        reporters = {
+            "Dirty Cells %": lambda m: (len(m.dirty_agents) / m.initial_dirty_cells * 100) if m.initial_dirty_cells > 0 else 0,
+            "Avg Battery %": lambda m: self._get_avg_battery(m),
+            "Active Agents": lambda m: self._get_active_agents(m),
+        }
+        if profile:
+            # Tiempos por fase en milisegundos; como se colecta al inicio del paso son los del paso anterior
+            reporters.update({
+                "Perception ms": lambda m: m.phase_times["perception"] * 1000,
+                "Neighbor scan ms": lambda m: m.phase_times["neighbor_scan"] * 1000,
+                "Move decision ms": lambda m: self._get_decision_time(m) * 1000,
+                "DataCollector ms": lambda m: m.phase_times["datacollector"] * 1000,
+            })
+        self.datacollector = DataCollector(model_reporters=reporters)
 
         self.running = True
 
+    def obstacles_changed(self):
+        """Descarta el grafo de navegación y los campos de distancia, que dependen de los obstáculos"""
+        self._navigation = None
+        self.distance_fields.clear()
+        self._distance_bytes = 0
+
+    def cell_index(self, cell):
+        """Índice de cell en el grafo de navegación y en los campos de distancia: x * height + y"""
+        x, y = cell.coordinate
+        return x * self.height + y
+
+    def board_values(self):
+        """Arreglo (height, width) con el valor de cada celda, para stream_server.py.
+
+        Si hay varios agentes en una celda gana la roomba, luego la estacion, la suciedad y el obstaculo.
+        """
+        values = np.zeros((self.height, self.width), dtype=np.uint8)
+        for agent in self.agents:
+            if isinstance(agent, RandomAgent):
+                value = DEAD_ROOMBA if agent.is_dead else ROOMBA
+            elif isinstance(agent, ChargingStation):
+                value = STATION
+            elif isinstance(agent, DirtyAgent):
+                value = DIRTY
+            elif isinstance(agent, ObstacleAgent):
+                value = OBSTACLE
+            else:
+                continue
+            x, y = agent.cell.coordinate
+            values[y, x] = max(values[y, x], value)
+        return values
+
+    def navigation(self):
+        """Grafo de las celdas transitables en formato CSR: (offsets, targets, cells).
+
+        Los vecinos sin obstáculo de la celda i son targets[offsets[i]:offsets[i + 1]]
+        y cells[j] es la celda de índice j. Como los obstáculos no se mueven se compila
+        una sola vez, con el orden de vecinos de la grid (MOORE). Se arma con numpy a
+        partir de la capa de obstáculos, sin pedirle cell.neighborhood a cada celda
+        (mesa guarda esa colección en cada celda y pesa mucho más que el grafo).
+        """
+        if self._navigation is None:
+            cells = [self.grid[(x, y)] for x in range(self.width) for y in range(self.height)]
+            blocked = self.grid.obstacle.data.ravel()
+            x, y = np.divmod(np.arange(self.width * self.height, dtype=np.int64), self.height)
+            nx = x[:, None] + np.array([dx for dx, _ in MOORE])
+            ny = y[:, None] + np.array([dy for _, dy in MOORE])
+            inside = (nx >= 0) & (nx < self.width) & (ny >= 0) & (ny < self.height)
+            neighbors = np.where(inside, nx * self.height + ny, 0)
+            walkable = inside & ~blocked[neighbors] & ~blocked[:, None]
+            offsets = np.zeros(len(cells) + 1, dtype=np.int64)
+            np.cumsum(walkable.sum(axis=1), out=offsets[1:])
+            self._navigation = (offsets, neighbors[walkable], cells)
+        return self._navigation
+
+    def walkable_neighbors(self, cell):
+        """Celdas vecinas de cell sin obstáculo, sacadas del grafo de navegación"""
+        offsets, targets, cells = self.navigation()
+        i = self.cell_index(cell)
+        return [cells[j] for j in targets[offsets[i]:offsets[i + 1]].tolist()]
+
+    def mark_seen(self, cell):
+        """Marca cell y sus vecinos transitables como explorados en el mapa de cobertura compartido"""
+        offsets, targets, _ = self.navigation()
+        i = self.cell_index(cell)
+        around = targets[offsets[i]:offsets[i + 1]]
+        seen = self.grid.seen.data.reshape(-1)
+        if not seen[i] or not seen[around].all():
+            seen[i] = True
+            seen[around] = True
+            self._frontier_stale = True
+
+    def coverage_changed(self):
+        """Avisa que cambió el conjunto de celdas por explorar (por ejemplo se limpió una celda)"""
+        self._frontier_stale = True
+
+    def frontier_field(self):
+        """Campo de distancias a la celda más cercana que falta explorar o que sigue sucia.
+
+        Mismo formato que distance_field. Como la cobertura cambia en casi todos los pasos,
+        se recalcula a lo más una vez por paso y lo comparten todos los agentes.
+        """
+        if self._frontier is None or (self._frontier_stale and self._frontier_step != self.steps):
+            walkable = ~self.grid.obstacle.data.reshape(-1)
+            pending = walkable & (~self.grid.seen.data.reshape(-1) | self.grid.dirty.data.reshape(-1))
+            self._frontier = self._bfs(np.flatnonzero(pending))
+            self._frontier_step = self.steps
+            self._frontier_stale = False
+        return self._frontier
+
+    def distance_field(self, stations):
+        """Campo de distancias a la estación más cercana del CellSet stations.
+
+        field[cell_index(cell)] es el número de pasos (vecindad de Moore, rodeando
+        obstáculos) desde cell hasta la estación más cercana, o UNREACHABLE si no hay camino.
+        Se calcula con un BFS que sale de todas las estaciones a la vez y se guarda por
+        conjunto de estaciones, así que los agentes que conocen las mismas estaciones
+        comparten el mismo campo. Se recalcula solo si cambian los obstáculos o el
+        conjunto de estaciones. Los campos guardados ocupan a lo más
+        MAX_DISTANCE_FIELD_BYTES, se descartan primero los usados hace más tiempo.
+        """
+        key = stations.key()
+        field = self.distance_fields.get(key)
+        if field is None:
+            field = self._bfs(stations.indices())
+            self.distance_fields[key] = field
+            self._distance_bytes += field.nbytes + len(key)
+            while self._distance_bytes > self.MAX_DISTANCE_FIELD_BYTES and len(self.distance_fields) > 1:
+                old_key, old_field = self.distance_fields.popitem(last=False)
+                self._distance_bytes -= old_field.nbytes + len(old_key)
+        else:
+            self.distance_fields.move_to_end(key)
+        return field
+
+    def _bfs(self, sources):
+        """BFS por niveles desde los índices sources sobre el grafo de navegación.
+
+        Todo el frente se expande a la vez con numpy; regresa la distancia de cada celda
+        a la fuente más cercana como uint16, o UNREACHABLE si no hay camino (las distancias
+        más largas que UNREACHABLE - 1 se quedan en UNREACHABLE - 1).
+        """
+        offsets, targets, _ = self.navigation()
+        field = np.full(self.width * self.height, self.UNREACHABLE, dtype=np.uint16)
+        frontier = np.asarray(sources, dtype=np.int64)
+        field[frontier] = 0
+        distance = 0
+        while len(frontier):
+            distance += 1
+            starts = offsets[frontier]
+            counts = offsets[frontier + 1] - starts
+            # Posiciones en targets de todos los vecinos del frente, una lista tras otra
+            edges = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            neighbors = targets[edges]
+            frontier = np.unique(neighbors[field[neighbors] == self.UNREACHABLE])
+            field[frontier] = min(distance, self.UNREACHABLE - 1)
+        return field
+
     def _get_avg_battery(self, model):
         """Calcula la batería promedio de los agentes activos"""
         agents = [a for a in model.agents if isinstance(a, RandomAgent) and not a.is_dead]
@@ -78,7 +262,19 @@ class RandomModel(Model):
         """Cuenta los agentes que siguen activos (no muertos)"""
         return len([a for a in model.agents if isinstance(a, RandomAgent) and not a.is_dead])
 
+    def _get_decision_time(self, model):
+        """Tiempo de move() que no fue percepcion ni revision de vecinos: la decision y el movimiento"""
+        times = model.phase_times
+        return times["move"] - times["perception"] - times["neighbor_scan"]
+
     def step(self):
         '''Advance the model by one step.'''
-        self.datacollector.collect(self)
+        if not self.profile:
+            self.datacollector.collect(self)
+        else:
+            start = time.perf_counter()
+            self.datacollector.collect(self)
+            collected = time.perf_counter()
+            self.phase_times = dict.fromkeys(self.phase_times, 0.0)
+            self.phase_times["datacollector"] = collected - start
         self.agents.shuffle_do("step")
@@ -0,0 +1,54 @@
+"""Run the Roomba RandomModel and stream the cells that change over a WebSocket.
+
+Every client gets a FULL frame of the grid when it connects and then one binary
+frame per step with only the changed cells (see streaming/frames.py at the root
+of the repository). The twgl viewer in CG_1/05_Stream draws them on the GPU.
+
+With --engine fleet the vectorized FleetModel (random_agents/fleet.py) is run
+instead, for thousands of roombas on big floor plans.
+
+Needs the websockets package (pip install websockets).
+
+Example:
+    python stream_server.py --width 200 --height 200 --agents 50 --dirty 2000
+    python stream_server.py --engine fleet --width 2000 --height 2000 --agents 10000 --dirty 200000 --obstacles 200000
+    then open CG_1/05_Stream/stream.html?port=8765&palette=roomba through the CG_1 vite server
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# El codificador de frames y el servidor estan en streaming/, en la raiz del repositorio
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from streaming.server import stream
+
+from random_agents.fleet import FleetModel
+from random_agents.model import RandomModel
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=28)
+    parser.add_argument("--height", type=int, default=28)
+    parser.add_argument("--agents", type=int, default=10)
+    parser.add_argument("--dirty", type=int, default=10, help="number of dirty cells")
+    parser.add_argument("--obstacles", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--engine", default="agents", choices=("agents", "fleet"))
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between steps")
+    parser.add_argument("--steps", type=int, default=None, help="stop after this many steps")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    model_class = FleetModel if args.engine == "fleet" else RandomModel
+    model = model_class(
+        num_agents=args.agents,
+        width=args.width,
+        height=args.height,
+        seed=args.seed,
+        dirty_cells=args.dirty,
+        num_obstacles=args.obstacles,
+    )
+    asyncio.run(stream(model, args.host, args.port, args.interval, args.steps))
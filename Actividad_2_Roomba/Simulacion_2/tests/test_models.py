@@ -0,0 +1,83 @@
+"""Reproducibility, navigation graph and streamed board of RandomModel and FleetModel.
+
+Run from Actividad_2_Roomba/Simulacion_2: python -m pytest -q
+"""
+import os
+import random
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+from random_agents.fleet import FleetModel
+from random_agents.model import RandomModel
+
+# streaming/ esta en la raiz del repositorio, como en stream_server.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from streaming import DELTA, FULL, DeltaEncoder
+
+PARAMS = {"num_agents": 5, "width": 30, "height": 20, "dirty_cells": 60, "num_obstacles": 40}
+
+
+def run(model_class, seed, steps=60):
+    """Board of every step of one run."""
+    model = model_class(seed=seed, **PARAMS)
+    boards = [model.board_values()]
+    while model.running and model.steps < steps:
+        model.step()
+        boards.append(model.board_values())
+    return boards
+
+
+@pytest.mark.parametrize("model_class", [RandomModel, FleetModel])
+@pytest.mark.parametrize("seed", [0, 7])
+def test_same_seed_same_run(model_class, seed):
+    # El random global no debe cambiar la corrida, todo sale de seed=
+    random.seed(1)
+    first = run(model_class, seed)
+    random.seed(2)
+    second = run(model_class, seed)
+    assert len(first) == len(second)
+    assert all(np.array_equal(a, b) for a, b in zip(first, second))
+
+
+@pytest.mark.parametrize("seed", [0, 3])
+def test_navigation_matches_grid(seed):
+    model = RandomModel(seed=seed, **PARAMS)
+    for cell in model.grid.all_cells:
+        # Las celdas con obstaculo no tienen aristas: ninguna roomba puede estar ahi
+        expected = [] if cell.obstacle else [neighbor for neighbor in cell.neighborhood if not neighbor.obstacle]
+        assert model.walkable_neighbors(cell) == expected
+
+
+def test_profile_is_opt_in():
+    plain = RandomModel(seed=0, **PARAMS)
+    timed = RandomModel(seed=0, profile=True, **PARAMS)
+    for model in (plain, timed):
+        for _ in range(3):
+            model.step()
+    assert "Perception ms" not in plain.datacollector.get_model_vars_dataframe()
+    assert "Perception ms" in timed.datacollector.get_model_vars_dataframe()
+
+
+def decode(frame, board):
+    """Apply one frame to board (None before the first FULL frame) and return the new board."""
+    if frame[0] == FULL:
+        _, _, width, height = struct.unpack_from("<BIII", frame)
+        return np.frombuffer(frame, dtype=np.uint8, offset=13).reshape(height, width).copy()
+    assert frame[0] == DELTA
+    _, _, count = struct.unpack_from("<BII", frame)
+    index = np.frombuffer(frame, dtype="<u4", count=count, offset=9)
+    board.ravel()[index] = np.frombuffer(frame, dtype=np.uint8, offset=9 + 4 * count)
+    return board
+
+
+@pytest.mark.parametrize("model_class", [RandomModel, FleetModel])
+def test_stream_round_trip(model_class):
+    boards = run(model_class, 4)
+    encoder = DeltaEncoder()
+    board = decode(encoder.full(0, boards[0]), None)
+    for step, expected in enumerate(boards[1:], start=1):
+        board = decode(encoder.frame(step, expected), board)
+        assert np.array_equal(board, expected)
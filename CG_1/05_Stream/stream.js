@@ -0,0 +1,225 @@
+/*
+ * Viewer for the binary frames sent by stream_server.py (Game of Life and Roomba)
+ * The board is kept as a texture of one byte per cell, and every DELTA frame
+ * only rewrites the rows of the texture that have changed cells.
+ *
+ * Frame format (little-endian), one byte per cell with index = y * width + x:
+ *   FULL:  uint8 kind (0), uint32 step, uint32 width, uint32 height, width * height uint8 values
+ *   DELTA: uint8 kind (1), uint32 step, uint32 count, count uint32 indices, count uint8 values
+ *
+ * Usage: stream.html?port=8765&palette=life (or palette=roomba)
+ */
+
+
+'use strict';
+
+import * as twgl from 'twgl-base.js';
+
+const FULL = 0;
+const DELTA = 1;
+
+// Color de cada valor de celda, en el orden que manda el servidor
+const palettes = {
+    // 0 DEAD, 1 ALIVE
+    life: [
+        [1, 1, 1, 1],
+        [0, 0, 0, 1],
+    ],
+    // 0 vacia, 1 obstaculo, 2 sucia, 3 estacion, 4 roomba, 5 roomba muerta
+    roomba: [
+        [1, 1, 1, 1],
+        [0.5, 0.5, 0.5, 1],
+        [0, 0.6, 0, 1],
+        [0, 0, 1, 1],
+        [1, 0, 0, 1],
+        [0, 0, 0, 1],
+    ],
+};
+
+const MAX_VALUES = 8;
+
+const vsGLSL = `#version 300 es
+in vec2 a_position;
+
+uniform vec2 u_scale;
+
+out vec2 v_texcoord;
+
+void main() {
+    // The quad covers clip space, scaled to keep the aspect ratio of the board
+    gl_Position = vec4(a_position * u_scale, 0, 1);
+    // y = 0 of the board at the bottom, like the mesa space components
+    v_texcoord = a_position * 0.5 + 0.5;
+}
+`;
+
+const fsGLSL = `#version 300 es
+precision highp float;
+
+in vec2 v_texcoord;
+
+uniform sampler2D u_cells;
+uniform vec4 u_palette[${MAX_VALUES}];
+
+out vec4 outColor;
+
+void main() {
+    int value = int(texture(u_cells, v_texcoord).r * 255.0 + 0.5);
+    outColor = u_palette[min(value, ${MAX_VALUES - 1})];
+}
+`;
+
+// Estado del tablero del lado del cliente
+const board = {
+    width: 0,
+    height: 0,
+    step: 0,
+    cells: null,      // Uint8Array con un byte por celda
+    texture: null,
+    resized: false,   // hay que crear la textura de nuevo
+    minRow: Infinity, // rango de filas que cambiaron desde el ultimo dibujo
+    maxRow: -1,
+};
+
+function main() {
+    const params = new URLSearchParams(window.location.search);
+    const port = params.get('port') || 8765;
+    const palette = palettes[params.get('palette') || 'life'];
+
+    const canvas = document.querySelector('canvas');
+    const gl = canvas.getContext('webgl2');
+
+    const programInfo = twgl.createProgramInfo(gl, [vsGLSL, fsGLSL]);
+
+    // Un solo cuadrado que cubre todo el canvas, dos triangulos
+    const arrays = {
+        a_position: { numComponents: 2, data: [-1, -1, 1, -1, 1, 1, -1, 1] },
+        indices: { numComponents: 3, data: [0, 1, 2, 0, 2, 3] },
+    };
+    const bufferInfo = twgl.createBufferInfoFromArrays(gl, arrays);
+    const vao = twgl.createVAOFromBufferInfo(gl, programInfo, bufferInfo);
+
+    const colors = [];
+    for (let i = 0; i < MAX_VALUES; i++) {
+        colors.push(...(palette[i] || palette[palette.length - 1]));
+    }
+
+    connect(`ws://${window.location.hostname || 'localhost'}:${port}`);
+
+    drawScene(gl, vao, programInfo, bufferInfo, colors);
+}
+
+// Abre el WebSocket y aplica cada frame al tablero
+function connect(url) {
+    const status = document.getElementById('status');
+    const socket = new WebSocket(url);
+    socket.binaryType = 'arraybuffer';
+
+    socket.onopen = () => { status.textContent = `Connected to ${url}`; };
+    socket.onclose = () => { status.textContent = `Disconnected from ${url}`; };
+    socket.onmessage = (event) => {
+        applyFrame(event.data);
+        status.textContent = `Step ${board.step} (${board.width} x ${board.height})`;
+    };
+}
+
+function applyFrame(buffer) {
+    const view = new DataView(buffer);
+    const kind = view.getUint8(0);
+    board.step = view.getUint32(1, true);
+
+    if (kind === FULL) {
+        const width = view.getUint32(5, true);
+        const height = view.getUint32(9, true);
+        if (width !== board.width || height !== board.height) {
+            board.width = width;
+            board.height = height;
+            board.resized = true;
+        }
+        board.cells = new Uint8Array(buffer.slice(13));
+        markRows(0, height - 1);
+    } else if (kind === DELTA) {
+        const count = view.getUint32(5, true);
+        // Los indices empiezan en el byte 9, que no esta alineado a 4: se copian
+        const indices = new Uint32Array(buffer.slice(9, 9 + 4 * count));
+        const values = new Uint8Array(buffer, 9 + 4 * count, count);
+        for (let i = 0; i < count; i++) {
+            board.cells[indices[i]] = values[i];
+        }
+        if (count > 0) {
+            // Los indices llegan ordenados, asi que la primera y ultima fila bastan
+            markRows(Math.floor(indices[0] / board.width),
+                     Math.floor(indices[count - 1] / board.width));
+        }
+    }
+}
+
+function markRows(first, last) {
+    board.minRow = Math.min(board.minRow, first);
+    board.maxRow = Math.max(board.maxRow, last);
+}
+
+// Sube a la GPU solo las filas que cambiaron
+function updateTexture(gl) {
+    if (board.cells === null) {
+        return;
+    }
+    gl.pixelStorei(gl.UNPACK_ALIGNMENT, 1);
+    if (board.resized || board.texture === null) {
+        if (board.texture !== null) {
+            gl.deleteTexture(board.texture);
+        }
+        board.texture = twgl.createTexture(gl, {
+            src: board.cells,
+            width: board.width,
+            height: board.height,
+            internalFormat: gl.R8,
+            format: gl.RED,
+            type: gl.UNSIGNED_BYTE,
+            minMag: gl.NEAREST,
+            wrap: gl.CLAMP_TO_EDGE,
+            auto: false,
+        });
+        board.resized = false;
+    } else if (board.maxRow >= board.minRow) {
+        gl.bindTexture(gl.TEXTURE_2D, board.texture);
+        gl.texSubImage2D(gl.TEXTURE_2D, 0, 0, board.minRow,
+                         board.width, board.maxRow - board.minRow + 1,
+                         gl.RED, gl.UNSIGNED_BYTE,
+                         board.cells, board.minRow * board.width);
+    }
+    board.minRow = Infinity;
+    board.maxRow = -1;
+}
+
+function drawScene(gl, vao, programInfo, bufferInfo, colors) {
+    twgl.resizeCanvasToDisplaySize(gl.canvas);
+    gl.viewport(0, 0, gl.canvas.width, gl.canvas.height);
+
+    gl.clearColor(1.0, 1.0, 1.0, 1.0);
+    gl.clear(gl.COLOR_BUFFER_BIT);
+
+    updateTexture(gl);
+
+    if (board.texture !== null) {
+        // Escala para que las celdas queden cuadradas
+        const boardAspect = board.width / board.height;
+        const canvasAspect = gl.canvas.width / gl.canvas.height;
+        const scale = boardAspect > canvasAspect
+            ? [1, canvasAspect / boardAspect]
+            : [boardAspect / canvasAspect, 1];
+
+        gl.useProgram(programInfo.program);
+        twgl.setUniforms(programInfo, {
+            u_scale: scale,
+            u_cells: board.texture,
+            u_palette: colors,
+        });
+        gl.bindVertexArray(vao);
+        twgl.drawBufferInfo(gl, bufferInfo);
+    }
+
+    requestAnimationFrame(() => drawScene(gl, vao, programInfo, bufferInfo, colors));
+}
+
+main()
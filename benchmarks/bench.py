@@ -0,0 +1,286 @@
+"""Headless benchmarks for the Game of Life and Roomba models.
+
+Runs ConwaysGameOfLife (Actividad_1/ejercicio_1 and ejercicio_2), the Roomba
+RandomModel (Actividad_2_Roomba/Simulacion_1 and Simulacion_2) and its
+vectorized FleetModel over a grid of sizes, densities, agent counts and
+engines. Every case runs in its own process so the packages of the different
+folders (both are called game_of_life or random_agents) do not clash and the
+peak RSS belongs to that case only.
+
+For each case it records:
+- init_s: seconds to build the model
+- steps, steps_per_s: steps run (the Roomba models stop early when everything is
+  clean) and throughput
+- p50_ms, p90_ms, p99_ms, max_ms: per-step latency percentiles
+- peak_rss_mb: peak resident memory of the process
+
+Results are written as JSON with the git commit, so a later run can be compared
+against them:
+    python benchmarks/bench.py --save benchmarks/baselines/main.json
+    python benchmarks/bench.py --compare benchmarks/baselines/main.json
+--compare exits with status 1 if any case got slower than --threshold.
+
+--hashlife-check times the hashlife engine of ejercicio_2 against plain
+evolve_bits stepping on random rings of 2000 cells and exits with status 1 if
+it is more than HASHLIFE_SLOWDOWN times slower.
+
+Example, only the Game of Life suites with the bigger grids:
+    python benchmarks/bench.py --suites gol1 gol2 --full
+"""
+import argparse
+import datetime
+import importlib
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## Carpeta y clase del modelo de cada suite
+SUITES = {
+    "gol1": ("Actividad_1/ejercicio_1", "game_of_life.model", "ConwaysGameOfLife"),
+    "gol2": ("Actividad_1/ejercicio_2", "game_of_life.model", "ConwaysGameOfLife"),
+    "roomba1": ("Actividad_2_Roomba/Simulacion_1", "random_agents.model", "RandomModel"),
+    "roomba2": ("Actividad_2_Roomba/Simulacion_2", "random_agents.model", "RandomModel"),
+    "fleet": ("Actividad_2_Roomba/Simulacion_2", "random_agents.fleet", "FleetModel"),
+}
+
+
+def default_cases(full=False, steps=None):
+    """Every case to run, as dicts with suite, params and steps.
+
+    full adds bigger grids; the agents engines only run on the small ones.
+    """
+    cases = []
+    sizes = (50, 200, 1000) if full else (50, 200)
+    for size, fraction in itertools.product(sizes, (0.2, 0.5)):
+        for engine in ("agents", "sweep", "bitpacked"):
+            if engine == "agents" and size > 200:
+                continue
+            params = {"width": size, "height": size, "initial_fraction_alive": fraction, "seed": 0, "engine": engine}
+            ## En ejercicio_1 el modelo termina cuando llega a la ultima fila
+            cases.append({"suite": "gol1", "params": params, "steps": steps or size - 1})
+        for engine in ("agents", "numpy", "bitpacked", "hashlife"):
+            if engine == "agents" and size > 200:
+                continue
+            params = {"width": size, "height": size, "initial_fraction_alive": fraction, "seed": 0, "engine": engine,
+                      "detect_cycles": False}
+            cases.append({"suite": "gol2", "params": params, "steps": steps or 100})
+
+    sizes = (28, 100, 300) if full else (28, 100)
+    for size, density in itertools.product(sizes, (0.05, 0.2)):
+        common = {"width": size, "height": size, "seed": 0,
+                  "dirty_cells": int(density * size * size), "num_obstacles": int(0.05 * size * size)}
+        cases.append({"suite": "roomba1", "params": {**common, "num_agents": 1}, "steps": steps or 500})
+        for agents in (10, 50):
+            cases.append({"suite": "roomba2", "params": {**common, "num_agents": agents}, "steps": steps or 500})
+            cases.append({"suite": "fleet", "params": {**common, "num_agents": agents}, "steps": steps or 500})
+
+    ## Flotas que solo corre FleetModel, la mas grande es la de planeacion de capacidad (10k en 2000x2000)
+    sizes = (500, 2000) if full else (500,)
+    for size in sizes:
+        common = {"width": size, "height": size, "seed": 0,
+                  "dirty_cells": int(0.05 * size * size), "num_obstacles": int(0.05 * size * size)}
+        cases.append({"suite": "fleet", "params": {**common, "num_agents": size * size // 400}, "steps": steps or 200})
+    return cases
+
+
+def case_key(case):
+    """Identify a case by its suite and parameters, to match it against a baseline."""
+    return case["suite"] + " " + " ".join(f"{k}={v}" for k, v in sorted(case["params"].items()))
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, None where resource is missing (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    ## Linux lo da en KB y macOS en bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_case(case):
+    """Run one case in this process and return its measurements."""
+    folder, module, name = SUITES[case["suite"]]
+    sys.path.insert(0, os.path.join(ROOT, folder))
+    model_class = getattr(importlib.import_module(module), name)
+
+    ## Los modelos de Roomba imprimen en cada evento, se manda a devnull para no medir la terminal
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            start = time.perf_counter()
+            model = model_class(**case["params"])
+            init_s = time.perf_counter() - start
+
+            latencies = []
+            total_start = time.perf_counter()
+            while model.running and len(latencies) < case["steps"]:
+                start = time.perf_counter()
+                model.step()
+                latencies.append(time.perf_counter() - start)
+            total = time.perf_counter() - total_start
+        finally:
+            sys.stdout = stdout
+
+    ms = sorted(latency * 1000 for latency in latencies)
+    if len(ms) > 1:
+        p50, p90, p99 = (statistics.quantiles(ms, n=100, method="inclusive")[i] for i in (49, 89, 98))
+    else:
+        p50 = p90 = p99 = ms[0] if ms else None
+    return {
+        "init_s": init_s,
+        "steps": len(latencies),
+        "steps_per_s": len(latencies) / total if total > 0 else None,
+        "p50_ms": p50,
+        "p90_ms": p90,
+        "p99_ms": p99,
+        "max_ms": ms[-1] if ms else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(case, timeout=None):
+    """Run case in a fresh interpreter and return case plus its measurements (or the error)."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--case", json.dumps(case)],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    if result.returncode != 0:
+        return {**case, "error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return {**case, **json.loads(result.stdout.strip().splitlines()[-1])}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print the throughput of every case against baseline and return the cases that regressed."""
+    old = {case_key(case): case for case in baseline["results"] if "error" not in case}
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    for case in results:
+        key = case_key(case)
+        if "error" in case or key not in old or not old[key].get("steps_per_s") or not case.get("steps_per_s"):
+            continue
+        ratio = case["steps_per_s"] / old[key]["steps_per_s"]
+        flag = ""
+        if ratio < 1 - threshold:
+            flag = "  <-- slower"
+            regressions.append(key)
+        print(f"{ratio:6.2f}x  {key}{flag}")
+    return regressions
+
+
+## Reglas no lineales (las lineales no pasan por hashlife) y generaciones del chequeo de hashlife
+HASHLIFE_RULES = (30, 110)
+HASHLIFE_STEPS = (4096, 65536)
+HASHLIFE_SLOWDOWN = 2.0
+
+
+def check_hashlife(width=2000, seed=0):
+    """Time HashLife.advance_ring against evolve_bits; return the (rule, steps) that were too slow."""
+    import random
+
+    sys.path.insert(0, os.path.join(ROOT, "Actividad_1/ejercicio_2"))
+    from game_of_life.hashlife import HashLife
+    from game_of_life.kernels import evolve_bits
+
+    ring = random.Random(seed).getrandbits(width)
+    slow = []
+    for rule, steps in itertools.product(HASHLIFE_RULES, HASHLIFE_STEPS):
+        start = time.perf_counter()
+        expected = evolve_bits(ring, width, rule, steps)
+        plain = time.perf_counter() - start
+        start = time.perf_counter()
+        result = HashLife(rule).advance_ring(ring, width, steps)
+        tree = time.perf_counter() - start
+        if result != expected:
+            raise AssertionError(f"hashlife and evolve_bits disagree for rule {rule} after {steps} steps")
+        flag = ""
+        if tree > HASHLIFE_SLOWDOWN * plain:
+            flag = "  <-- slower"
+            slow.append((rule, steps))
+        print(f"rule {rule:3} {steps:6} steps: hashlife {tree:.3f} s  evolve_bits {plain:.3f} s{flag}")
+    return slow
+
+
+def print_result(case):
+    if "error" in case:
+        print(f"{case_key(case)}: ERROR {case['error']}")
+        return
+    rss = f"{case['peak_rss_mb']:.0f} MB" if case["peak_rss_mb"] is not None else "n/a"
+    p50 = f"{case['p50_ms']:.2f}" if case["p50_ms"] is not None else "n/a"
+    p99 = f"{case['p99_ms']:.2f}" if case["p99_ms"] is not None else "n/a"
+    print(f"{case['steps_per_s'] or 0:10.1f} steps/s  p50 {p50} ms  p99 {p99} ms  {rss:>7}  {case_key(case)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", nargs="+", default=list(SUITES), choices=list(SUITES))
+    parser.add_argument("--full", action="store_true", help="add the bigger grids")
+    parser.add_argument("--steps", type=int, default=None, help="steps per case, default depends on the suite")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case, the fastest one is kept")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds before a case is given up")
+    parser.add_argument("--save", default=None, help="write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown that counts as a regression")
+    parser.add_argument("--hashlife-check", action="store_true", help="only time hashlife against evolve_bits")
+    parser.add_argument("--case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    ## Proceso hijo: corre un solo caso y regresa el resultado como JSON
+    if args.case is not None:
+        print(json.dumps(run_case(json.loads(args.case))))
+        sys.exit(0)
+
+    if args.hashlife_check:
+        sys.exit(1 if check_hashlife() else 0)
+
+    results = []
+    for case in default_cases(full=args.full, steps=args.steps):
+        if case["suite"] not in args.suites:
+            continue
+        ## Con --repeat se queda la corrida mas rapida, la menos afectada por ruido de la maquina
+        runs = []
+        for _ in range(args.repeat):
+            try:
+                runs.append(run_isolated(case, timeout=args.timeout))
+            except subprocess.TimeoutExpired:
+                runs.append({**case, "error": f"timeout after {args.timeout} s"})
+        result = max(runs, key=lambda run: run.get("steps_per_s") or 0)
+        print_result(result)
+        results.append(result)
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
@@ -0,0 +1,6 @@
+"""Stream a model's board to the CG_1/05_Stream viewer, shared by every stream_server.py.
+
+The stream_server.py scripts add the root of the repository to sys.path and
+import from here, so all the activities send the same frames.
+"""
+from .frames import DELTA, FULL, DeltaEncoder, encode_delta, encode_full
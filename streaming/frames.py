@@ -0,0 +1,64 @@
+"""Binary frames with the cells that changed each step, for the stream_server.py scripts.
+
+The board is sent as one byte per cell, in row-major order (index = y * width + x),
+and every frame starts with a little-endian header:
+- FULL:  uint8 kind, uint32 step, uint32 width, uint32 height, then width * height uint8 values
+- DELTA: uint8 kind, uint32 step, uint32 count, then count uint32 indices and count uint8 values
+
+After the first FULL frame only DELTA frames are needed; a FULL frame is sent
+again when the board changes size or when it is smaller than the delta.
+The viewer in CG_1/05_Stream reads this same format. The boards are built by
+each model's board_values(): the Game of Life sends 0/1 and the Roomba models
+send the cell values defined in random_agents/model.py.
+"""
+
+import struct
+
+import numpy as np
+
+FULL = 0
+DELTA = 1
+
+FULL_HEADER = struct.Struct("<BIII")
+DELTA_HEADER = struct.Struct("<BII")
+
+
+def encode_full(step, values):
+    """Encode a (height, width) uint8 array as a FULL frame."""
+    height, width = values.shape
+    return FULL_HEADER.pack(FULL, step, width, height) + np.ascontiguousarray(values, dtype=np.uint8).tobytes()
+
+
+def encode_delta(step, index, values):
+    """Encode the flat indices of the changed cells and their new values as a DELTA frame."""
+    return (
+        DELTA_HEADER.pack(DELTA, step, len(index))
+        + np.asarray(index, dtype="<u4").tobytes()
+        + np.asarray(values, dtype=np.uint8).tobytes()
+    )
+
+
+class DeltaEncoder:
+    """Remember the last board sent and turn each new one into the smallest frame."""
+
+    def __init__(self):
+        self.last = None
+
+    def full(self, step, values):
+        """FULL frame of values, also used as the base for the next delta."""
+        self.last = np.array(values, dtype=np.uint8, order="C")
+        return encode_full(step, self.last)
+
+    def frame(self, step, values):
+        """Frame that brings a client that has the last board up to values."""
+        values = np.asarray(values, dtype=np.uint8)
+        if self.last is None or self.last.shape != values.shape:
+            return self.full(step, values)
+        index = np.flatnonzero(values != self.last)
+        ## Cada cambio cuesta 5 bytes: si cambio mas de 1/5 del tablero conviene mandarlo completo
+        if len(index) * 5 >= values.size:
+            return self.full(step, values)
+        changed = values.ravel()[index]
+        self.last.ravel()[index] = changed
+        return encode_delta(step, index, changed)
+
@@ -0,0 +1,37 @@
+"""WebSocket loop that steps a model and broadcasts its board as frames (see frames.py).
+
+The model only needs step(), steps, running and board_values(), which returns
+the board as a (height, width) uint8 array with y = 0 in row 0.
+
+Needs the websockets package (pip install websockets).
+"""
+import asyncio
+
+from websockets.asyncio.server import broadcast, serve
+
+from .frames import DeltaEncoder, encode_full
+
+
+async def stream(model, host="localhost", port=8765, interval=0.1, max_steps=None):
+    """Step model every interval seconds and broadcast each step to the connected clients."""
+    encoder = DeltaEncoder()
+    encoder.full(model.steps, model.board_values())
+    clients = set()
+
+    async def handler(websocket):
+        ## Un cliente nuevo recibe primero el tablero completo y despues solo los cambios
+        ## Se agrega a clients antes del primer await para no perder ningun paso
+        frame = encode_full(model.steps, encoder.last)
+        clients.add(websocket)
+        try:
+            await websocket.send(frame)
+            await websocket.wait_closed()
+        finally:
+            clients.discard(websocket)
+
+    async with serve(handler, host, port):
+        print(f"Streaming on ws://{host}:{port}")
+        while model.running and (max_steps is None or model.steps < max_steps):
+            model.step()
+            broadcast(clients, encoder.frame(model.steps, model.board_values()))
+            await asyncio.sleep(interval)